@@ -0,0 +1,125 @@
+"""Cold-start time to first byte, with and without the template cache.
+
+Starts a fresh interpreter per run and measures the time from process
+spawn until the first response body of each page is ready, via the test
+client. Variants:
+
+- no bytecode cache (TEMPLATE_CACHE_DIR="")
+- empty bytecode cache, as on the first boot after a deploy
+- precompiled bytecode cache (``flask precompile-templates``)
+- precompiled cache plus ``create_app(warm=True)``
+
+Usage:
+    python benchmarks/bench_coldstart.py --runs 10
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PAGES = ('/home', '/post/1', '/user/bench', '/about', '/login')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--warm', action='store_true', help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def child(warm):
+    """Runs inside the measured process; prints its timings as JSON."""
+    started = float(os.environ['BENCH_SPAWNED_AT'])
+    from flaskblog import create_app
+    imported = time.time()
+    app = create_app(warm=warm)
+    created = time.time()
+    client = app.test_client()
+    first = {}
+    for page in PAGES:
+        t0 = time.time()
+        response = client.get(page)
+        assert response.status_code == 200, (page, response.status_code)
+        first[page] = (time.time() - t0) * 1000
+    t0 = time.time()
+    client.get('/about')
+    print(json.dumps({
+        'import': (imported - started) * 1000,
+        'create_app': (created - imported) * 1000,
+        'first_byte': (created - started) * 1000 + first['/home'],
+        'first_pages': sum(first.values()),
+        'repeat': (time.time() - t0) * 1000,
+    }))
+
+
+def measure(env, warm, runs, reset_cache=None):
+    results = []
+    for _ in range(runs):
+        if reset_cache:
+            shutil.rmtree(reset_cache, ignore_errors=True)
+        command = [sys.executable, os.path.abspath(__file__), '--child']
+        if warm:
+            command.append('--warm')
+        env['BENCH_SPAWNED_AT'] = repr(time.time())
+        output = subprocess.run(command, env=env, capture_output=True, text=True, check=True)
+        results.append(json.loads(output.stdout.strip().splitlines()[-1]))
+    return {key: statistics.median(r[key] for r in results) for key in results[0]}
+
+
+def main():
+    args = parse_args()
+    if args.child:
+        child(args.warm)
+        return
+
+    workdir = tempfile.mkdtemp(prefix='flaskblog-coldstart-')
+    cache_dir = os.path.join(workdir, 'jinja_cache')
+    env = dict(os.environ, PYTHONPATH=ROOT, SECRET_KEY='bench', PAGE_CACHE_ENABLED='0',
+               DATABASE_URI='sqlite:///' + os.path.join(workdir, 'bench.db'),
+               MAIL_QUEUE_PATH=os.path.join(workdir, 'mail.db'), TEMPLATE_CACHE_DIR=cache_dir)
+    os.environ.update(env)
+
+    from flaskblog import create_app, db
+    from flaskblog.migrations import upgrade
+    from flaskblog.models import Post, User
+    from flaskblog.templating import compile_templates
+
+    app = create_app()
+    with app.app_context():
+        upgrade()
+        db.session.add(User(username='bench', email='bench@example.com', password='x'))
+        for i in range(20):
+            post = Post(title=f'Post {i}', user_id=1)
+            post.set_content('lorem ipsum dolor sit amet ' * 40)
+            db.session.add(post)
+        db.session.commit()
+
+    variants = [
+        ('no bytecode cache', dict(env, TEMPLATE_CACHE_DIR=''), False, None),
+        ('empty bytecode cache', env, False, cache_dir),
+        ('precompiled cache', env, False, None),
+        ('precompiled cache + warm', env, True, None),
+    ]
+    print(f"Median of {args.runs} fresh processes, milliseconds "
+          f"(first pages: first hit on each of {', '.join(PAGES)})\n")
+    print(f"{'variant':<26} {'import':>8} {'create_app':>11} {'first byte':>11} "
+          f"{'first pages':>12} {'repeat':>8}")
+    for label, variant_env, warm, reset_cache in variants:
+        if label == 'precompiled cache':
+            compile_templates(app)
+        row = measure(variant_env, warm, args.runs, reset_cache)
+        print(f"{label:<26} {row['import']:>8.1f} {row['create_app']:>11.1f} "
+              f"{row['first_byte']:>11.1f} {row['first_pages']:>12.1f} {row['repeat']:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
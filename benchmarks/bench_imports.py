@@ -0,0 +1,101 @@
+"""Startup import cost of the app, measured with ``python -X importtime``.
+
+Runs ``create_app()`` in fresh interpreters, reports the median total
+import time and the heaviest top-level imports, and fails (exit status 1)
+if the budget is exceeded or a module that should only load on first use
+is imported at startup. Run it before and after changing imports.
+
+Usage:
+    python benchmarks/bench_imports.py --runs 5 --budget-ms 800
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only needed on specific paths: profile picture uploads, sending mail and
+# password hashing on the process pool.
+LAZY_MODULES = ('PIL', 'flask_mail', 'smtplib', 'multiprocessing')
+
+LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help='heaviest imports to list')
+    parser.add_argument('--budget-ms', type=float,
+                        help='fail if the median total import time exceeds this')
+    parser.add_argument('--lazy', nargs='*', default=LAZY_MODULES,
+                        help='modules that must not be imported at startup')
+    return parser.parse_args()
+
+
+def parse_importtime(stderr):
+    """Parses ``-X importtime`` output.
+
+    Returns:
+        tuple: (total microseconds, {module: cumulative microseconds} for
+        top-level imports and their direct children, set of every imported
+        module)
+    """
+    total = 0
+    heavy = {}
+    modules = set()
+    for line in stderr.splitlines():
+        match = LINE.match(line)
+        if not match:
+            continue
+        cumulative, depth, name = int(match[2]), len(match[3]), match[4]
+        modules.add(name)
+        if depth == 1:
+            total += cumulative
+        if depth in (1, 3):
+            heavy[name] = max(heavy.get(name, 0), cumulative)
+    return total, heavy, modules
+
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix='flaskblog-imports-')
+    env = dict(os.environ, PYTHONPATH=ROOT, SECRET_KEY='bench',
+               DATABASE_URI='sqlite:///' + os.path.join(workdir, 'bench.db'),
+               MAIL_QUEUE_PATH=os.path.join(workdir, 'mail.db'),
+               TEMPLATE_CACHE_DIR=os.path.join(workdir, 'jinja_cache'))
+    code = 'from flaskblog import create_app; create_app()'
+    totals, heavy, modules = [], {}, set()
+    for _ in range(args.runs):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                                env=env, capture_output=True, text=True)
+        if result.returncode:
+            sys.exit(result.stderr)
+        total, run_heavy, run_modules = parse_importtime(result.stderr)
+        totals.append(total)
+        modules |= run_modules
+        for name, cumulative in run_heavy.items():
+            heavy.setdefault(name, []).append(cumulative)
+
+    median = statistics.median(totals) / 1000
+    print(f"create_app() import time: median {median:.1f} ms over {args.runs} runs "
+          f"(min {min(totals) / 1000:.1f}, max {max(totals) / 1000:.1f}), "
+          f"{len(modules)} modules\n")
+    ranked = sorted(heavy.items(), key=lambda item: -statistics.median(item[1]))
+    for name, values in ranked[:args.top]:
+        print(f"{statistics.median(values) / 1000:>8.1f} ms  {name}")
+
+    failures = [f"{name} is imported at startup" for name in args.lazy if name in modules]
+    if args.budget_ms is not None and median > args.budget_ms:
+        failures.append(f"median import time {median:.1f} ms exceeds the {args.budget_ms:.0f} ms budget")
+    if failures:
+        print('\nFAILED:\n  ' + '\n  '.join(failures))
+        sys.exit(1)
+    print('\nOK')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""Query plans and latency for the feed queries, before and after indexing.
+
+Seeds a throwaway SQLite database with deterministic users and posts, runs
+the real feed/timeline queries with the post indexes dropped, then applies
+the migrations and runs them again.
+
+Usage:
+    python benchmarks/bench_indexes.py --posts 1000000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=1_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    return parser.parse_args()
+
+
+def seed(conn, post_table, user_table, n_users, n_posts, rng):
+    conn.execute(user_table.insert(), [
+        {'id': i, 'username': f'user{i}', 'email': f'user{i}@example.com',
+         'password': 'x', 'image_file': 'default.jpg'}
+        for i in range(1, n_users + 1)])
+    start = datetime(2020, 1, 1)
+    batch = []
+    for i in range(1, n_posts + 1):
+        batch.append({'id': i, 'title': f'Post {i}', 'content': 'Lorem ipsum ' * 20,
+                      'user_id': rng.randint(1, n_users),
+                      'date_posted': start + timedelta(seconds=i * 60 + rng.randint(0, 59))})
+        if len(batch) == 50_000:
+            conn.execute(post_table.insert(), batch)
+            batch.clear()
+    if batch:
+        conn.execute(post_table.insert(), batch)
+
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix='flaskblog-bench-')
+    os.environ['DATABASE_URI'] = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+    os.environ.setdefault('SECRET_KEY', 'bench')
+
+    from sqlalchemy import event
+    from sqlalchemy.orm import joinedload
+    from flaskblog import create_app, db
+    from flaskblog.migrations import upgrade
+    from flaskblog.models import Post, User
+    from flaskblog.pagination import encode_cursor, keyset_paginate
+
+    app = create_app()
+    rng = random.Random(args.seed)
+    with app.app_context():
+        db.create_all()
+        with db.engine.begin() as conn:
+            for index in Post.__table__.indexes:
+                index.drop(conn, checkfirst=True)
+            t0 = time.perf_counter()
+            seed(conn, Post.__table__, User.__table__, args.users, args.posts, rng)
+            print(f"Seeded {args.posts} posts in {time.perf_counter() - t0:.1f}s")
+
+        deep = db.session.get(Post, args.posts // 10)
+        deep_cursor = encode_cursor(deep)
+        user_id = deep.user_id
+        db.session.expunge_all()
+
+        cases = {
+            'home, first page': lambda: keyset_paginate(
+                Post.query.options(joinedload(Post.author)), 5),
+            'home, deep cursor page': lambda: keyset_paginate(
+                Post.query.options(joinedload(Post.author)), 5, before=deep_cursor),
+            'timeline, first page': lambda: keyset_paginate(
+                Post.query.filter_by(user_id=user_id).options(joinedload(Post.author)), 5),
+            'home, numbered page 1000': lambda: Post.query.order_by(
+                Post.date_posted.desc()).paginate(page=1000, per_page=5),
+        }
+
+        def run(label):
+            print(f"\n=== {label}")
+            for name, func in cases.items():
+                captured = []
+
+                def capture(conn, cursor, statement, parameters, context, executemany):
+                    captured.append((statement, parameters))
+
+                event.listen(db.engine, 'before_cursor_execute', capture)
+                with app.test_request_context():
+                    func()
+                event.remove(db.engine, 'before_cursor_execute', capture)
+                timings = []
+                for _ in range(args.repeat):
+                    with app.test_request_context():
+                        t0 = time.perf_counter()
+                        func()
+                        timings.append((time.perf_counter() - t0) * 1000)
+                    db.session.remove()
+                print(f"{name}: median {statistics.median(timings):.2f} ms, "
+                      f"max {max(timings):.2f} ms")
+                for statement, parameters in captured:
+                    with db.engine.connect() as conn:
+                        plan = conn.exec_driver_sql(
+                            'EXPLAIN QUERY PLAN ' + statement, parameters).all()
+                    for row in plan:
+                        print(f"    {row[-1]}")
+
+        run('without indexes')
+        t0 = time.perf_counter()
+        upgrade()
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql('ANALYZE')
+        print(f"\nMigrations applied in {time.perf_counter() - t0:.1f}s")
+        run('with indexes')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Search latency for the FTS5 and in-memory backends.
+
+Seeds a throwaway SQLite database with deterministic posts drawn from a
+Zipf-like vocabulary, then times rare, medium and common queries against
+each backend.
+
+Usage:
+    python benchmarks/bench_search.py --posts 1000000
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=1_000_000)
+    parser.add_argument('--vocabulary', type=int, default=20_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--window', type=int, default=1000,
+                        help='SEARCH_CANDIDATE_LIMIT to benchmark with')
+    parser.add_argument('--skip-memory', action='store_true',
+                        help='only benchmark FTS5 (the memory index needs several GB at 1M posts)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix='flaskblog-bench-')
+    os.environ['DATABASE_URI'] = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+    os.environ.setdefault('SECRET_KEY', 'bench')
+
+    from flaskblog import create_app, db
+    from flaskblog.migrations import upgrade
+    from flaskblog.models import Post, User
+    from flaskblog.search import FTS5Backend, MemoryIndex, tokenize
+
+    rng = random.Random(args.seed)
+    words = [f'w{i}' for i in range(args.vocabulary)]
+    cum_weights = list(itertools.accumulate(1 / (i + 1) for i in range(args.vocabulary)))
+    app = create_app()
+    with app.app_context():
+        upgrade()
+        with db.engine.begin() as conn:
+            conn.execute(User.__table__.insert(), [
+                {'id': 1, 'username': 'bench', 'email': 'bench@example.com',
+                 'password': 'x', 'image_file': 'default.jpg'}])
+            t0 = time.perf_counter()
+            start = datetime(2020, 1, 1)
+            for offset in range(0, args.posts, 50_000):
+                conn.execute(Post.__table__.insert(), [
+                    {'title': ' '.join(rng.choices(words, cum_weights=cum_weights, k=6)),
+                     'content': ' '.join(rng.choices(words, cum_weights=cum_weights, k=60)),
+                     'user_id': 1, 'date_posted': start + timedelta(minutes=i)}
+                    for i in range(offset, min(offset + 50_000, args.posts))])
+            print(f"Seeded and indexed {args.posts} posts in {time.perf_counter() - t0:.1f}s")
+
+        queries = {
+            'rare word': f'w{args.vocabulary - 1}',
+            'medium word': 'w500',
+            'two medium words': 'w300 w700',
+            'common word': 'w0',
+        }
+        backends = [FTS5Backend()]
+        if not args.skip_memory:
+            memory = MemoryIndex()
+            t0 = time.perf_counter()
+            memory.build()
+            print(f"Built memory index in {time.perf_counter() - t0:.1f}s")
+            backends.append(memory)
+
+        for backend in backends:
+            print(f"\n=== {backend.name}")
+            for label, query in queries.items():
+                timings = []
+                for _ in range(args.repeat):
+                    t0 = time.perf_counter()
+                    ids, total = backend.search(tokenize(query), 0, 5, args.window)
+                    timings.append((time.perf_counter() - t0) * 1000)
+                print(f"{label} ({total} ranked matches): median {statistics.median(timings):.2f} ms, "
+                      f"max {max(timings):.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
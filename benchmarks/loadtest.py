@@ -0,0 +1,451 @@
+"""Load test the app with a reproducible dataset and request mix.
+
+Seeds a throwaway SQLite database with deterministic users and posts, then
+replays a weighted request mix (one JSON request per line, see
+benchmarks/mix.jsonl) through the Flask test client or a local threaded WSGI
+server. Reports throughput and p50/p95/p99 latency per endpoint and can save
+the results as JSON, tagged with the current commit, to compare runs.
+
+Mix lines look like::
+
+    {"name": "post", "method": "GET", "path": "/post/{post_id}", "weight": 25}
+
+``method`` defaults to GET, ``weight`` to 1 and ``name`` to the path. Set
+``"auth": true`` to send the request as a logged-in user, ``"data"`` for a
+form body and ``"headers"`` for extra request headers. Paths and form values
+may use the placeholders {post_id}, {user_id}, {username}, {word}, {cursor},
+{text} and {n} (the request's position in the run); they are drawn from the
+seeded dataset with the same seed, so a run is repeatable.
+
+Usage:
+    python benchmarks/loadtest.py --posts 10000 --requests 5000 -o before.json
+    python benchmarks/loadtest.py --posts 10000 --requests 5000 --compare before.json
+    python benchmarks/loadtest.py --server --concurrency 8
+"""
+import argparse
+import http.client
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from urllib.parse import urlencode
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PASSWORD = 'password'
+START = datetime(2020, 1, 1)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--posts', type=int, default=10_000)
+    parser.add_argument('--vocabulary', type=int, default=5_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--mix', default=os.path.join(ROOT, 'benchmarks', 'mix.jsonl'),
+                        help='weighted request mix, one JSON request per line')
+    parser.add_argument('--replay', metavar='FILE',
+                        help='replay the requests in FILE in order instead of sampling --mix')
+    parser.add_argument('--save-sequence', metavar='FILE',
+                        help='write the expanded request sequence to FILE for --replay')
+    parser.add_argument('--requests', type=int, default=None,
+                        help='requests to measure (default 5000, or the length of --replay)')
+    parser.add_argument('--warmup', type=int, default=200,
+                        help='unmeasured requests sent first')
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--server', action='store_true',
+                        help='serve the app on a local threaded WSGI server and send real HTTP '
+                             'requests instead of using the test client')
+    parser.add_argument('--no-page-cache', action='store_true',
+                        help='run with PAGE_CACHE_ENABLED=0 (default: 1, as the run is one process)')
+    parser.add_argument('-o', '--output', help='write the results as JSON to this file')
+    parser.add_argument('--compare', metavar='FILE',
+                        help='print latency and throughput changes against saved results')
+    return parser.parse_args()
+
+
+class Dataset:
+    """The deterministic users and posts a run is seeded with."""
+
+    def __init__(self, users, posts, vocabulary):
+        self.users = users
+        self.posts = posts
+        self.words = [f'w{i}' for i in range(vocabulary)]
+        # Zipf-like word frequencies, as in bench_search.py.
+        self.cum_weights = list(itertools.accumulate(1 / (i + 1) for i in range(vocabulary)))
+
+    def phrase(self, rng, k):
+        return ' '.join(rng.choices(self.words, cum_weights=self.cum_weights, k=k))
+
+    @staticmethod
+    def username(user_id):
+        return f'user{user_id}'
+
+    @staticmethod
+    def email(user_id):
+        return f'user{user_id}@example.com'
+
+    @staticmethod
+    def date_posted(post_id):
+        return START + timedelta(minutes=post_id)
+
+    def seed(self, rng, password_hash):
+        """Inserts the users and posts with Core ``executemany`` batches."""
+        from flaskblog import db
+        from flaskblog.migrations import reconcile_post_counts
+        from flaskblog.models import Post, User, summarize
+
+        with db.engine.begin() as conn:
+            conn.execute(User.__table__.insert(), [
+                {'id': i, 'username': self.username(i), 'email': self.email(i),
+                 'password': password_hash, 'image_file': 'default.jpg'}
+                for i in range(1, self.users + 1)])
+            for offset in range(1, self.posts + 1, 10_000):
+                rows = []
+                for i in range(offset, min(offset + 10_000, self.posts + 1)):
+                    content = self.phrase(rng, rng.randint(20, 300))
+                    excerpt, word_count = summarize(content)
+                    rows.append({'id': i, 'title': self.phrase(rng, 6), 'content': content,
+                                 'excerpt': excerpt, 'word_count': word_count,
+                                 'user_id': rng.randint(1, self.users),
+                                 'date_posted': self.date_posted(i),
+                                 'updated_at': self.date_posted(i)})
+                conn.execute(Post.__table__.insert(), rows)
+        reconcile_post_counts()
+
+
+class Placeholders(dict):
+    """Values for one request's placeholders, drawn on first use."""
+
+    def __init__(self, dataset, rng, n):
+        super().__init__(n=n)
+        self.dataset = dataset
+        self.rng = rng
+
+    def __missing__(self, key):
+        from flaskblog.pagination import encode_cursor
+
+        dataset, rng = self.dataset, self.rng
+        if key == 'post_id':
+            value = rng.randint(1, dataset.posts)
+        elif key == 'user_id':
+            value = rng.randint(1, dataset.users)
+        elif key == 'username':
+            value = dataset.username(self['user_id'])
+        elif key == 'word':
+            value = dataset.phrase(rng, 1)
+        elif key == 'text':
+            value = dataset.phrase(rng, 80)
+        elif key == 'cursor':
+            post_id = self['post_id']
+            value = encode_cursor(SimpleNamespace(id=post_id,
+                                                  date_posted=dataset.date_posted(post_id)))
+        else:
+            raise KeyError(f'unknown placeholder {{{key}}}')
+        self[key] = value
+        return value
+
+
+def load_requests(path):
+    """Reads a request mix or sequence file, filling in defaults."""
+    entries = []
+    with open(path, encoding='utf-8') as fp:
+        for line in fp:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            entry.setdefault('method', 'GET')
+            entry.setdefault('name', entry['path'])
+            entries.append(entry)
+    return entries
+
+
+def expand(entry, values):
+    """Returns ``entry`` with its placeholders substituted."""
+    request = {key: value for key, value in entry.items() if key != 'weight'}
+    request['path'] = entry['path'].format_map(values)
+    if entry.get('data'):
+        request['data'] = {key: str(value).format_map(values)
+                           for key, value in entry['data'].items()}
+    return request
+
+
+def build_sequence(entries, count, dataset, rng, replay=False):
+    """Expands a mix into ``count`` concrete requests.
+
+    A mix is sampled by weight; a replay file is used in order (repeated if
+    ``count`` is larger). The same seed always gives the same sequence.
+    """
+    if replay:
+        chosen = itertools.islice(itertools.cycle(entries), count)
+    else:
+        chosen = rng.choices(entries, weights=[e.get('weight', 1) for e in entries], k=count)
+    return [expand(entry, Placeholders(dataset, rng, n)) for n, entry in enumerate(chosen)]
+
+
+class TestClientSession:
+    """Sends requests through ``app.test_client()``; keeps its cookies."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def send(self, request):
+        response = self.client.open(request['path'], method=request['method'],
+                                    data=request.get('data'), headers=request.get('headers'))
+        size = len(response.get_data())
+        response.close()
+        return response.status_code, size
+
+
+class HTTPSession:
+    """Sends requests over one keep-alive HTTP connection; keeps its cookies."""
+
+    def __init__(self, host, port):
+        self.conn = http.client.HTTPConnection(host, port, timeout=30)
+        self.cookies = {}
+
+    def send(self, request):
+        headers = dict(request.get('headers') or {})
+        body = None
+        if request.get('data'):
+            body = urlencode(request['data'])
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{k}={v}' for k, v in self.cookies.items())
+        self.conn.request(request['method'], request['path'], body, headers)
+        response = self.conn.getresponse()
+        size = len(response.read())
+        for header in response.headers.get_all('Set-Cookie') or ():
+            name, _, value = header.split(';', 1)[0].partition('=')
+            self.cookies[name.strip()] = value
+        return response.status, size
+
+
+def log_in(session, user_id, dataset):
+    status, _ = session.send({'method': 'POST', 'path': '/login',
+                              'data': {'email': dataset.email(user_id), 'password': PASSWORD}})
+    if status != 302:
+        raise RuntimeError(f'login as {dataset.username(user_id)} failed with {status}')
+
+
+def run(sequence, concurrency, make_session, dataset):
+    """Sends ``sequence`` from ``concurrency`` threads.
+
+    Each thread has an anonymous session and, once an ``auth`` request comes
+    up, a session logged in as its own user. Latency covers sending the
+    request and reading the whole body.
+
+    Returns:
+        tuple: (list of (name, status, seconds), wall-clock seconds)
+    """
+    counter = itertools.count()
+    samples = []
+    failures = []
+
+    def worker(index):
+        anonymous = make_session()
+        authenticated = None
+        local = []
+        try:
+            while True:
+                position = next(counter)
+                if position >= len(sequence):
+                    break
+                request = sequence[position]
+                session = anonymous
+                if request.get('auth'):
+                    if authenticated is None:
+                        authenticated = make_session()
+                        log_in(authenticated, index % dataset.users + 1, dataset)
+                    session = authenticated
+                t0 = time.perf_counter()
+                status, _ = session.send(request)
+                local.append((request['name'], status, time.perf_counter() - t0))
+        except Exception as e:
+            failures.append(e)
+        samples.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    t0 = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - t0
+    if failures:
+        raise failures[0]
+    return samples, elapsed
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize_samples(samples, elapsed):
+    """Aggregates raw samples into per-endpoint and overall figures."""
+    by_name = {}
+    for name, status, seconds in samples:
+        by_name.setdefault(name, []).append((status, seconds))
+
+    def figures(rows):
+        latencies = sorted(seconds * 1000 for _, seconds in rows)
+        return {
+            'count': len(rows),
+            'errors': sum(1 for status, _ in rows if status >= 400),
+            'throughput': round(len(rows) / elapsed, 1),
+            'mean_ms': round(sum(latencies) / len(latencies), 3),
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+            'max_ms': round(latencies[-1], 3),
+        }
+
+    endpoints = {name: figures(rows) for name, rows in sorted(by_name.items())}
+    total = figures([(status, seconds) for _, status, seconds in samples])
+    total['seconds'] = round(elapsed, 3)
+    return {'total': total, 'endpoints': endpoints}
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                    cwd=ROOT, capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, dirty
+
+
+def print_results(results, baseline=None):
+    header = f"{'endpoint':<16} {'count':>6} {'err':>4} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    print(header)
+    print('-' * len(header))
+    rows = list(results['endpoints'].items()) + [('TOTAL', results['total'])]
+    for name, row in rows:
+        print(f"{name:<16} {row['count']:>6} {row['errors']:>4} {row['throughput']:>8.1f} "
+              f"{row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f}")
+    if baseline is None:
+        return
+    print(f"\nChange against {baseline['meta'].get('commit') or 'baseline'} "
+          f"(negative latency and positive req/s are improvements)")
+    for key in ('transport', 'python'):
+        if baseline['meta'].get(key) != results['meta'][key]:
+            print(f"warning: {key} differs ({baseline['meta'].get(key)} vs {results['meta'][key]})")
+    for key in ('users', 'posts', 'concurrency', 'seed', 'no_page_cache'):
+        if baseline['meta']['args'].get(key) != results['meta']['args'][key]:
+            print(f"warning: --{key.replace('_', '-')} differs "
+                  f"({baseline['meta']['args'].get(key)} vs {results['meta']['args'][key]})")
+    print(f"{'endpoint':<16} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    old_rows = dict(baseline['endpoints'], TOTAL=baseline['total'])
+    for name, row in rows:
+        old = old_rows.get(name)
+        if old is None:
+            print(f"{name:<16} {'new':>8}")
+            continue
+        changes = [_change(old[key], row[key]) for key in ('throughput', 'p50_ms', 'p95_ms', 'p99_ms')]
+        print(f"{name:<16} " + ' '.join(f'{change:>8}' for change in changes))
+
+
+def _change(old, new):
+    if not old:
+        return 'n/a'
+    return f'{(new - old) / old * 100:+.1f}%'
+
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix='flaskblog-load-')
+    os.environ['DATABASE_URI'] = 'sqlite:///' + os.path.join(workdir, 'load.db')
+    os.environ['MAIL_QUEUE_PATH'] = os.path.join(workdir, 'mail.db')
+    os.environ.setdefault('SECRET_KEY', 'bench')
+    # Logins only happen once per worker; cheap hashes keep seeding fast.
+    os.environ.setdefault('BCRYPT_LOG_ROUNDS', '4')
+    os.environ.setdefault('PASSWORD_HASH_WORKERS', '0')
+    # Every simulated client logs in from the same address.
+    os.environ.setdefault('RATELIMIT_ENABLED', '0')
+    os.environ['PAGE_CACHE_ENABLED'] = '0' if args.no_page_cache else '1'
+
+    from flaskblog import create_app, hasher
+    from flaskblog.migrations import upgrade
+
+    app = create_app()
+    app.config['WTF_CSRF_ENABLED'] = False
+    dataset = Dataset(args.users, args.posts, args.vocabulary)
+    with app.app_context():
+        upgrade()
+        t0 = time.perf_counter()
+        dataset.seed(random.Random(args.seed), hasher.generate_password_hash(PASSWORD))
+        print(f"Seeded {args.users} users and {args.posts} posts in {time.perf_counter() - t0:.1f}s")
+
+    replay = args.replay is not None
+    entries = load_requests(args.replay or args.mix)
+    count = args.requests or (len(entries) if replay else 5000)
+    sequence = build_sequence(entries, count, dataset, random.Random(args.seed), replay)
+    warmup = build_sequence(entries, args.warmup, dataset, random.Random(args.seed + 1), replay)
+    if args.save_sequence:
+        with open(args.save_sequence, 'w', encoding='utf-8') as fp:
+            for request in sequence:
+                fp.write(json.dumps(request) + '\n')
+
+    server = None
+    if args.server:
+        from werkzeug.serving import WSGIRequestHandler, make_server
+
+        WSGIRequestHandler.protocol_version = 'HTTP/1.1'
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        make_session = lambda: HTTPSession('127.0.0.1', server.server_port)  # noqa: E731
+    else:
+        make_session = lambda: TestClientSession(app)  # noqa: E731
+
+    try:
+        run(warmup, args.concurrency, make_session, dataset)
+        samples, elapsed = run(sequence, args.concurrency, make_session, dataset)
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    commit, dirty = git_commit()
+    results = {
+        'meta': {
+            'commit': commit,
+            'dirty': dirty,
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'transport': 'http' if args.server else 'test-client',
+            'args': vars(args),
+        },
+        **summarize_samples(samples, elapsed),
+    }
+    print(f"\n{len(samples)} requests in {elapsed:.2f}s with concurrency {args.concurrency} "
+          f"({'HTTP' if args.server else 'test client'})\n")
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as fp:
+            baseline = json.load(fp)
+    print_results(results, baseline)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fp:
+            json.dump(results, fp, indent=2)
+            fp.write('\n')
+        print(f"\nSaved results to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
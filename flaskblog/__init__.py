@@ -1,49 +1,108 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from flask_bcrypt import Bcrypt
 from flask_login import LoginManager
-from flask_mail import Mail
+from werkzeug.middleware.proxy_fix import ProxyFix
 from flaskblog.config import Config
+from flaskblog.assets import StaticAssets
+from flaskblog.cache import IdentityCache, PageCache
+from flaskblog.counters import ViewCounter
+from flaskblog.database import PoolMonitor, ReplicaRouter, RoutingSession
+from flaskblog.hashing import PasswordHasher
+from flaskblog.images import ImagePipeline
+from flaskblog.mailqueue import LazyMail, MailQueue
+from flaskblog.metrics import Metrics
+from flaskblog.ratelimit import RateLimiter
+from flaskblog.templating import init_bytecode_cache, warm_up
+from flaskblog.timeline import HomeTimeline
 
 # Initialize Flask extensions
-db = SQLAlchemy()
-bcrypt = Bcrypt()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+static_assets = StaticAssets()
+hasher = PasswordHasher()
+images = ImagePipeline()
 login_manager = LoginManager()
 login_manager.login_view = "users.login"
 login_manager.login_message_category = "info"
-mail = Mail()
+mail = LazyMail()
+mail_queue = MailQueue()
+metrics = Metrics()
+pool_monitor = PoolMonitor()
+rate_limiter = RateLimiter()
+replica_router = ReplicaRouter()
+page_cache = PageCache()
+home_timeline = HomeTimeline()
+view_counter = ViewCounter()
+user_cache = IdentityCache()
 
 
-def create_app(config_class=Config):
+def create_app(config_class=Config, warm=None):
     """Create and configure the Flask application.
     This is the main entry point for the Flask application. It initializes
-    the Flask app, sets up the database, bcrypt for password hashing,
-    login manager for user sessions, and mail for sending emails. It also
-    registers the blueprints for different parts of the application.
+    the Flask app, sets up the database and its read replicas, the bcrypt process pool for password hashing,
+    the profile picture pipeline, fingerprinted static assets, login manager for user sessions,
+    and mail for sending emails. It also registers the blueprints for different parts of the
+    application and installs the shared Jinja bytecode cache.
 
     Args:
         config_class (class): Configuration class to use.
+        warm (bool, optional): Compile every template and the URL matcher and
+            load the home timeline now rather than on first request. Defaults
+            to ``WARM_ON_START``.
 
     Returns:
         Flask: Configured Flask application instance.
     """
     app = Flask(__name__)
     app.config.from_object(Config)
+    proxies = app.config.get('TRUSTED_PROXIES', 0)
+    if proxies:
+        # Take the client address and scheme from the trusted proxies' headers.
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxies, x_proto=proxies)
 
     # Initialize extensions with the app    
     db.init_app(app)
-    bcrypt.init_app(app)
+    pool_monitor.init_app(app, db)
+    replica_router.init_app(app, db)
+    metrics.init_app(app, db)
+    hasher.init_app(app)
+    rate_limiter.init_app(app)
+    images.init_app(app)
+    static_assets.init_app(app)
     login_manager.init_app(app)
     mail.init_app(app)
+    mail_queue.init_app(app)
+    page_cache.init_app(app)
+    home_timeline.init_app(app, db)
+    view_counter.init_app(app, db)
+    user_cache.init_app(app)
 
     # Register blueprints
     from flaskblog.users.routes import users
     from flaskblog.posts.routes import posts
     from flaskblog.main.routes import main
     from flaskblog.errors.handlers import errors
+    from flaskblog.admin.routes import admin
+    from flaskblog.api.routes import api
+    from flaskblog.commands import commands
     app.register_blueprint(users)
     app.register_blueprint(posts)
     app.register_blueprint(main)
     app.register_blueprint(errors)
+    app.register_blueprint(admin)
+    app.register_blueprint(api)
+    app.register_blueprint(commands)
+
+    init_bytecode_cache(app)
+    if warm is None:
+        warm = app.config.get('WARM_ON_START')
+    if warm:
+        warm_up(app)
+        if home_timeline.enabled:
+            with app.app_context():
+                home_timeline.rebuild()
+                # Forked workers must not share the connections the rebuild opened.
+                db.session.remove()
+                for engine in db.engines.values():
+                    engine.dispose()
 
     return app
\ No newline at end of file
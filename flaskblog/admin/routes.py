@@ -0,0 +1,80 @@
+from datetime import datetime
+from functools import wraps
+from flask import Blueprint, Response, abort, current_app, jsonify, request, stream_with_context
+from flask_login import current_user, login_required
+from flaskblog.export import EXPORTS, FORMATS, export
+from flaskblog.metrics import STATS_EXTENSIONS
+
+admin = Blueprint('admin', __name__, url_prefix='/admin')
+
+
+def admin_required(view):
+    """Restricts a view to users whose email is listed in ADMIN_EMAILS.
+
+    Anonymous users are sent to the login page; other users get a 403.
+    """
+    @wraps(view)
+    @login_required
+    def wrapper(*args, **kwargs):
+        if current_user.email.lower() not in current_app.config.get('ADMIN_EMAILS', ()):
+            abort(403)
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def _date_arg(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        abort(400, f"'{name}' must be an ISO 8601 date")
+
+
+@admin.route("/export/<string:kind>")
+@admin_required
+def export_data(kind):
+    """Stream a bulk export of posts or users as a file download.
+
+    Rows are fetched in batches and written to the response as they are
+    produced, so exporting millions of rows uses constant memory.
+
+    Args:
+        kind (str): "posts" or "users".
+
+    Query Params:
+        format (str): "jsonl" (default) or "csv".
+        author (str): Only posts by this username.
+        since (str): Only posts published at or after this ISO 8601 date.
+        until (str): Only posts published before this ISO 8601 date.
+
+    Returns:
+        Response: Chunked attachment, or 404 for an unknown kind or format.
+    """
+    fmt = request.args.get('format', 'jsonl')
+    if kind not in EXPORTS or fmt not in FORMATS:
+        abort(404)
+    filters = {}
+    if kind == 'posts':
+        filters = {'author': request.args.get('author'),
+                   'since': _date_arg('since'), 'until': _date_arg('until')}
+    response = Response(stream_with_context(export(kind, fmt, **filters)), mimetype=FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename={kind}.{fmt}'
+    response.cache_control.no_store = True
+    return response
+
+
+@admin.route("/stats")
+@admin_required
+def stats():
+    """Return live counters of the database pool, caches and workers as JSON.
+
+    Values are per worker process, since each process has its own pool,
+    in-process caches and executors.
+
+    Returns:
+        Response: JSON object keyed by extension name.
+    """
+    return jsonify({name: current_app.extensions[name].stats()
+                    for name in STATS_EXTENSIONS if name in current_app.extensions})
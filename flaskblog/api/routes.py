@@ -0,0 +1,87 @@
+from flask import Blueprint, request
+from werkzeug.exceptions import HTTPException
+from flaskblog.api.utils import (LIST_FIELDS, MAX_LIMIT, POST_FIELDS, json_response,
+                                 post_query_options, request_int, requested_fields,
+                                 requested_truncation, serialize_post)
+from flaskblog.compression import compress_response
+from flaskblog.models import Post, User
+from flaskblog.pagination import keyset_paginate
+
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+api.after_request(compress_response)
+
+
+@api.errorhandler(HTTPException)
+def api_error(error):
+    """Return API errors as JSON instead of HTML error pages."""
+    return json_response({'error': {'status': error.code, 'message': error.description}},
+                         error.code)
+
+
+# The app's own handlers for these codes would otherwise take precedence.
+for code in (400, 403, 404, 500, 503):
+    api.register_error_handler(code, api_error)
+
+
+def _post_page(query, total=None):
+    fields = requested_fields(LIST_FIELDS)
+    limit = request_int('limit', 20, 1, MAX_LIMIT)
+    truncate_to = requested_truncation()
+    page = keyset_paginate(query.options(*post_query_options(fields)), limit,
+                           before=request.args.get('before'),
+                           after=request.args.get('after'))
+    return json_response({
+        'items': [serialize_post(post, fields, truncate_to) for post in page.items],
+        'next_cursor': page.next_cursor,
+        'prev_cursor': page.prev_cursor,
+        **({'total': total} if total is not None else {}),
+    })
+
+
+@api.route("/posts")
+def list_posts():
+    """List posts, newest first, with cursor pagination.
+
+    Query Params:
+        before (str): Cursor from ``next_cursor``; return older posts.
+        after (str): Cursor from ``prev_cursor``; return newer posts.
+        limit (int): Posts per page, 1-100. Defaults to 20.
+        fields (str): Comma-separated fields to return. Defaults to every
+            field except ``content``.
+        truncate (int): Shorten ``content`` to this many characters.
+
+    Returns:
+        Response: ``{"items": [...], "next_cursor": ..., "prev_cursor": ...}``.
+    """
+    return _post_page(Post.query)
+
+
+@api.route("/posts/<int:post_id>")
+def get_post(post_id):
+    """Return a single post, including its content by default.
+
+    Query Params:
+        fields (str): Comma-separated fields to return.
+        truncate (int): Shorten ``content`` to this many characters.
+
+    Returns:
+        Response: The post resource, or a JSON 404.
+    """
+    fields = requested_fields(POST_FIELDS)
+    truncate_to = requested_truncation()
+    post = Post.query.options(*post_query_options(fields)).filter_by(id=post_id).first_or_404()
+    return json_response(serialize_post(post, fields, truncate_to))
+
+
+@api.route("/users/<string:username>/posts")
+def user_posts(username):
+    """List one author's posts, newest first, with cursor pagination.
+
+    Accepts the same query parameters as ``/posts``.
+
+    Returns:
+        Response: A page of posts plus ``total``, the author's post count,
+        or a JSON 404 for an unknown user.
+    """
+    user = User.query.filter_by(username=username).first_or_404()
+    return _post_page(Post.query.filter_by(user_id=user.id), total=user.post_count)
@@ -0,0 +1,136 @@
+import json
+from datetime import datetime
+from flask import abort, current_app, request, url_for
+from sqlalchemy.orm import joinedload, load_only
+from flaskblog.models import Post, User
+
+try:
+    import orjson
+except ImportError:  # Optional; the standard library encoder is used instead.
+    orjson = None
+
+# Fields a post resource may expose, and the default set for list endpoints.
+# Lists omit ``content`` unless asked for it, so feeds stay small.
+POST_FIELDS = ('id', 'title', 'excerpt', 'word_count', 'content', 'date_posted', 'updated_at',
+               'author', 'url')
+LIST_FIELDS = ('id', 'title', 'excerpt', 'word_count', 'date_posted', 'updated_at', 'author', 'url')
+
+MAX_LIMIT = 100
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def dumps(data):
+    """Serializes ``data`` to compact UTF-8 JSON bytes.
+
+    Uses orjson when it is installed, which is several times faster than
+    the standard library encoder on large pages.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, default=_default)
+    return json.dumps(data, default=_default, ensure_ascii=False,
+                      separators=(',', ':')).encode('utf-8')
+
+
+def json_response(data, status=200):
+    """Builds a JSON response with the fast encoder."""
+    return current_app.response_class(dumps(data), status=status, mimetype='application/json')
+
+
+def requested_fields(default):
+    """Parses the ``fields`` query parameter (a sparse fieldset).
+
+    Args:
+        default (tuple): Fields returned when the parameter is absent.
+
+    Returns:
+        tuple: Requested field names, in ``POST_FIELDS`` order.
+    """
+    raw = request.args.get('fields')
+    if not raw:
+        return default
+    fields = {field.strip() for field in raw.split(',') if field.strip()}
+    unknown = fields.difference(POST_FIELDS)
+    if unknown:
+        abort(400, f"Unknown fields: {', '.join(sorted(unknown))}")
+    return tuple(field for field in POST_FIELDS if field in fields)
+
+
+def request_int(name, default, minimum, maximum):
+    """Reads a bounded integer query parameter, or aborts with a 400."""
+    value = request.args.get(name, default, type=int)
+    if value is None or not minimum <= value <= maximum:
+        abort(400, f"'{name}' must be an integer between {minimum} and {maximum}")
+    return value
+
+
+def post_query_options(fields):
+    """Returns loader options fetching only the columns ``fields`` need.
+
+    ``content`` is the only large column; list views that do not ask for
+    it never read it from the database.
+    """
+    columns = [Post.id, Post.title, Post.excerpt, Post.word_count, Post.date_posted,
+               Post.updated_at, Post.user_id]
+    if 'content' in fields:
+        columns.append(Post.content)
+    options = [load_only(*columns)]
+    if 'author' in fields:
+        options.append(joinedload(Post.author).load_only(User.id, User.username, User.image_file))
+    return options
+
+
+def requested_truncation():
+    """Reads the optional ``truncate`` query parameter (content length)."""
+    if 'truncate' not in request.args:
+        return None
+    return request_int('truncate', None, 1, 100000)
+
+
+def truncate(text, length):
+    """Shortens ``text`` at a word boundary to ``length`` characters plus an ellipsis.
+
+    Returns:
+        tuple: ``(text, truncated)``.
+    """
+    if len(text) <= length:
+        return text, False
+    cut = text[:length]
+    words = cut.rsplit(None, 1)
+    if len(words) == 2 and not text[length].isspace():
+        cut = words[0]
+    return cut.rstrip() + '…', True
+
+
+def serialize_post(post, fields, truncate_to=None):
+    """Converts a post to a JSON-ready dict holding only ``fields``.
+
+    Args:
+        post (Post): The post, loaded with ``post_query_options(fields)``.
+        fields (tuple): Field names to include.
+        truncate_to (int, optional): Maximum ``content`` length in characters.
+
+    Returns:
+        dict: The post resource.
+    """
+    data = {}
+    for field in fields:
+        if field == 'author':
+            author = post.author
+            data['author'] = {
+                'id': author.id,
+                'username': author.username,
+                'image_url': url_for('static', filename='profile_pics/' + author.image_file,
+                                     _external=True),
+            }
+        elif field == 'url':
+            data['url'] = url_for('posts.post', post_id=post.id, _external=True)
+        elif field == 'content' and truncate_to is not None:
+            data['content'], data['content_truncated'] = truncate(post.content, truncate_to)
+        else:
+            data[field] = getattr(post, field)
+    return data
@@ -0,0 +1,188 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+import threading
+from flask import current_app, request, send_from_directory
+from flaskblog.compression import brotli, negotiate_encoding
+
+# Fingerprinted copies and the manifest live here, inside the static folder.
+BUILD_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+
+# User uploads are content-addressed already and never fingerprinted.
+SKIP_DIRS = (BUILD_DIR, 'profile_pics')
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json', '.txt', '.xml', '.html', '.map')
+
+# Processed profile pictures are named after their content hash (see images.py).
+HASHED_PICTURE = re.compile(r'^profile_pics/[0-9a-f]{16}(?:-\d+)?\.(?:jpg|webp)$')
+
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+def _atomic_write(path, data):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _compressed_variants(data):
+    # Best first, the order negotiate_encoding expects.
+    variants = {}
+    if brotli is not None:
+        variants['br'] = brotli.compress(data, quality=11)
+    variants['gzip'] = gzip.compress(data, compresslevel=9, mtime=0)
+    return variants
+
+
+def build_assets(static_folder, clear=False):
+    """Fingerprints the static files and writes precompressed siblings.
+
+    Every file outside ``dist/`` and ``profile_pics/`` is copied to
+    ``dist/<path>/<stem>.<hash><ext>``, where ``<hash>`` is taken from its
+    content. Text formats also get ``.gz`` and, if the optional ``brotli``
+    package is installed, ``.br`` siblings at maximum compression, kept
+    only when smaller. ``dist/manifest.json`` maps original names to the
+    copies; it is written last, so a running app never sees a manifest
+    pointing at missing files.
+
+    Copies from earlier builds are kept, so pages rendered before a deploy
+    can still load their assets, unless ``clear`` is set.
+
+    Args:
+        static_folder (str): The app's static folder.
+        clear (bool): Delete earlier builds first.
+
+    Returns:
+        dict: The manifest's ``assets`` mapping.
+    """
+    output = os.path.join(static_folder, BUILD_DIR)
+    if clear:
+        shutil.rmtree(output, ignore_errors=True)
+    assets = {}
+    for root, dirs, files in os.walk(static_folder):
+        if root == static_folder:
+            dirs[:] = [name for name in dirs if name not in SKIP_DIRS]
+        for name in sorted(files):
+            source = os.path.join(root, name)
+            logical = os.path.relpath(source, static_folder).replace(os.sep, '/')
+            with open(source, 'rb') as f:
+                data = f.read()
+            digest = hashlib.sha256(data).hexdigest()[:12]
+            stem, ext = os.path.splitext(logical)
+            path = f'{BUILD_DIR}/{stem}.{digest}{ext}'
+            target = os.path.join(static_folder, *path.split('/'))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            encodings = []
+            if ext.lower() in COMPRESSIBLE:
+                for encoding, compressed in _compressed_variants(data).items():
+                    if len(compressed) < len(data):
+                        _atomic_write(target + ENCODING_SUFFIXES[encoding], compressed)
+                        encodings.append(encoding)
+            _atomic_write(target, data)
+            assets[logical] = {'path': path, 'encodings': encodings}
+    os.makedirs(output, exist_ok=True)
+    manifest = json.dumps({'assets': assets}, indent=2, sort_keys=True).encode('utf-8')
+    _atomic_write(os.path.join(output, MANIFEST_NAME), manifest)
+    return assets
+
+
+class StaticAssets:
+    """Serves fingerprinted static files with far-future caching.
+
+    Once ``flask build-assets`` has written a manifest, ``url_for('static',
+    filename='main.css')`` produces the fingerprinted URL instead. Those
+    files, and hash-named profile pictures, are served with
+    ``Cache-Control: public, max-age=<STATIC_MAX_AGE>, immutable`` so
+    browsers never revalidate them; a changed file gets a new URL. When the
+    client accepts it, the precompressed ``.br`` or ``.gz`` sibling is sent
+    instead of compressing on every request.
+
+    Without a manifest, or for files not in it, static files are served by
+    Flask as before.
+
+    Configuration:
+        STATIC_MAX_AGE (int): ``max-age`` of immutable responses, in seconds.
+
+    Attributes:
+        assets (dict): Original filename to ``{'path', 'encodings'}``.
+        immutable_responses (int): Responses sent with the immutable policy.
+        precompressed_responses (int): Responses sent from a ``.br``/``.gz`` file.
+    """
+
+    def __init__(self, app=None):
+        self.assets = {}
+        self.max_age = 31536000
+        self.immutable_responses = 0
+        self.precompressed_responses = 0
+        self.static_folder = None
+        self._encodings = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Loads the manifest and takes over the app's static route."""
+        self.static_folder = app.static_folder
+        self.max_age = app.config.get('STATIC_MAX_AGE', self.max_age)
+        app.extensions['static_assets'] = self
+        if not app.has_static_folder:
+            return
+        self.load_manifest()
+        app.url_defaults(self._fingerprint)
+        app.view_functions['static'] = self.send_static_file
+
+    def load_manifest(self):
+        """(Re)reads the manifest; a missing one leaves URLs unchanged."""
+        try:
+            with open(os.path.join(self.static_folder, BUILD_DIR, MANIFEST_NAME), encoding='utf-8') as f:
+                self.assets = json.load(f)['assets']
+        except FileNotFoundError:
+            self.assets = {}
+        self._encodings = {asset['path']: tuple(asset['encodings']) for asset in self.assets.values()}
+
+    def _fingerprint(self, endpoint, values):
+        if endpoint == 'static':
+            asset = self.assets.get(values.get('filename'))
+            if asset is not None:
+                values['filename'] = asset['path']
+
+    def send_static_file(self, filename):
+        """View for the ``static`` endpoint."""
+        encodings = self._encodings.get(filename)
+        if encodings is None and not HASHED_PICTURE.match(filename):
+            return current_app.send_static_file(filename)
+        encoding = negotiate_encoding(request.accept_encodings, encodings) if encodings else None
+        if encoding is None:
+            response = current_app.send_static_file(filename)
+        else:
+            mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            response = send_from_directory(self.static_folder,
+                                           filename + ENCODING_SUFFIXES[encoding],
+                                           mimetype=mimetype)
+            response.headers['Content-Encoding'] = encoding
+        if encodings:
+            response.vary.add('Accept-Encoding')
+        if response.status_code in (200, 304):
+            response.cache_control.public = True
+            response.cache_control.max_age = self.max_age
+            response.cache_control.immutable = True
+            response.cache_control.no_cache = None
+            with self._lock:
+                self.immutable_responses += 1
+                if encoding is not None:
+                    self.precompressed_responses += 1
+        return response
+
+    def stats(self):
+        """Returns asset counters."""
+        return {
+            'assets': len(self.assets),
+            'immutable_responses': self.immutable_responses,
+            'precompressed_responses': self.precompressed_responses,
+        }
@@ -0,0 +1,387 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, g, request, session, make_response
+from flask_login import current_user
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+
+
+class CacheBackend:
+    """Interface for cache storage backends.
+
+    Backends store arbitrary picklable values under string keys with an
+    optional time-to-live, plus integer counters used as tag versions.
+    """
+
+    def get(self, key):
+        """Returns the value stored under ``key`` or None."""
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        """Stores ``value`` under ``key`` for ``ttl`` seconds (forever if None)."""
+        raise NotImplementedError
+
+    def delete(self, key):
+        """Removes ``key`` if present."""
+        raise NotImplementedError
+
+    def incr(self, key):
+        """Atomically increments the counter ``key`` and returns the new value."""
+        raise NotImplementedError
+
+    def get_counter(self, key):
+        """Returns the current value of counter ``key`` (0 if never incremented)."""
+        raise NotImplementedError
+
+    def clear(self):
+        """Removes every entry."""
+        raise NotImplementedError
+
+    def __len__(self):
+        return 0
+
+
+class LRUCache(CacheBackend):
+    """In-process LRU cache with per-entry TTL.
+
+    Entries are evicted least-recently-used first once ``max_entries`` is
+    reached; expired entries are dropped when read. Counters are kept apart
+    and never evicted, so a tag version cannot silently reset.
+
+    Args:
+        max_entries (int): Maximum number of entries kept.
+    """
+
+    def __init__(self, max_entries=2048):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def get_counter(self, key):
+        return self._counters.get(key, 0)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._counters.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisCache(CacheBackend):
+    """Cache shared between worker processes through Redis.
+
+    Requires the optional ``redis`` package.
+
+    Args:
+        url (str): Redis connection URL.
+        prefix (str): Prefix added to every key.
+    """
+
+    def __init__(self, url, prefix='flaskblog:'):
+        import redis
+        self._client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self._client.get(self.prefix + key)
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl=None):
+        self._client.set(self.prefix + key, pickle.dumps(value), ex=ttl)
+
+    def delete(self, key):
+        self._client.delete(self.prefix + key)
+
+    def incr(self, key):
+        return self._client.incr(self.prefix + 'counter:' + key)
+
+    def get_counter(self, key):
+        raw = self._client.get(self.prefix + 'counter:' + key)
+        return int(raw) if raw is not None else 0
+
+    def clear(self):
+        for key in self._client.scan_iter(self.prefix + '*'):
+            self._client.delete(key)
+
+    def __len__(self):
+        # Entries under this prefix, not counters; SCAN walks the whole
+        # keyspace, so this is for stats, not request paths.
+        counters = (self.prefix + 'counter:').encode()
+        return sum(1 for key in self._client.scan_iter(match=self.prefix + '*', count=1000)
+                   if not key.startswith(counters))
+
+
+def make_backend(config, prefix):
+    """Builds the cache backend selected by ``CACHE_BACKEND``.
+
+    Args:
+        config (Config): The app configuration.
+        prefix (str): Key prefix separating caches that share a store.
+
+    Returns:
+        CacheBackend: ``LRUCache`` for "memory", ``RedisCache`` for "redis".
+    """
+    if config.get('CACHE_BACKEND', 'memory') == 'redis':
+        return RedisCache(config['CACHE_REDIS_URL'], prefix=f'flaskblog:{prefix}:')
+    return LRUCache(config.get('CACHE_MAX_ENTRIES', 2048))
+
+
+def add_cache_tags(*tags):
+    """Tags the page being rendered so ``PageCache.invalidate`` can drop it.
+
+    Views call this for every row their output depends on, e.g.
+    ``post:<id>`` for each post shown, ideally before querying it: the tag
+    version is snapshotted on the first call. Outside a cached view it is
+    a no-op.
+    """
+    page_tags = g.get('cache_tags')
+    if page_tags is None:
+        return
+    new_tags = [tag for tag in tags if tag not in page_tags]
+    page_tags.update(current_app.extensions['page_cache']._tag_versions(new_tags))
+
+
+# Response headers replayed on cache hits, so HTTP validators survive caching.
+CACHED_HEADERS = ('ETag', 'Last-Modified', 'Cache-Control', 'Vary')
+
+
+class PageCache:
+    """Caches rendered pages for anonymous visitors with tag invalidation.
+
+    Each cached page records the version of every tag it depends on.
+    ``invalidate`` bumps tag versions, so stale pages are detected on read;
+    this works the same for in-process and shared backends. Entries also
+    expire after ``PAGE_CACHE_TTL`` seconds.
+
+    Invalidations only reach processes that share the backend, so the
+    cache is on by default only with ``CACHE_BACKEND=redis``. With the
+    in-process LRU, other workers would keep serving a page until its TTL
+    ran out; enable it explicitly only for single-process deployments.
+
+    With read replicas, the write behind an invalidation may not have
+    reached the replica the next render reads from. For
+    ``REPLICA_STICKY_SECONDS`` after a tag is invalidated, pages with that
+    tag rendered from a replica are served but not stored.
+
+    Attributes:
+        hits (int): Requests served from the cache.
+        misses (int): Cacheable requests that had to be rendered.
+        invalidations (int): Tags invalidated.
+        replica_skips (int): Renders not stored because the replica may lag.
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        self.ttl = 60
+        self.enabled = True
+        self.replica_lag = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.replica_skips = 0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configures the backend from the app config."""
+        self.backend = make_backend(app.config, 'page')
+        self.ttl = app.config.get('PAGE_CACHE_TTL', 60)
+        shared = app.config.get('CACHE_BACKEND', 'memory') == 'redis'
+        enabled = app.config.get('PAGE_CACHE_ENABLED')
+        self.enabled = shared if enabled is None else enabled
+        if app.config.get('DATABASE_REPLICA_URIS'):
+            self.replica_lag = app.config.get('REPLICA_STICKY_SECONDS', 10)
+        app.extensions['page_cache'] = self
+
+    def _cacheable(self):
+        return (self.enabled and request.method == 'GET'
+                and '_flashes' not in session
+                and not current_user.is_authenticated)
+
+    def _tag_versions(self, tags):
+        return {tag: self.backend.get_counter('tag:' + tag) for tag in tags}
+
+    def _replica_may_lag(self, tags):
+        if not self.replica_lag or not current_app.extensions['replica_router'].served_replica():
+            return False
+        cutoff = time.time() - self.replica_lag
+        return any((self.backend.get('invalidated:' + tag) or 0) > cutoff for tag in tags)
+
+    def cached(self, view):
+        """Decorator caching a view's 200 responses for anonymous GETs."""
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not self._cacheable():
+                return view(*args, **kwargs)
+            key = 'page:' + request.full_path
+            entry = self.backend.get(key)
+            if entry is not None and entry['tags'] == self._tag_versions(entry['tags']):
+                self._count('hits')
+                response = make_response(entry['body'], entry['status'])
+                response.content_type = entry['content_type']
+                response.headers.extend(entry['headers'])
+                response.headers['X-Cache'] = 'HIT'
+                return response.make_conditional(request)
+            self._count('misses')
+            g.cache_tags = {}
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not session.modified:
+                if self._replica_may_lag(g.cache_tags):
+                    self._count('replica_skips')
+                else:
+                    self.backend.set(key, {
+                        'body': response.get_data(),
+                        'status': response.status_code,
+                        'content_type': response.content_type,
+                        'headers': [(name, response.headers[name]) for name in CACHED_HEADERS
+                                    if name in response.headers],
+                        'tags': g.cache_tags,
+                    }, self.ttl)
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+
+    def invalidate(self, *tags):
+        """Marks every cached page tagged with any of ``tags`` as stale."""
+        for tag in tags:
+            self.backend.incr('tag:' + tag)
+            if self.replica_lag:
+                self.backend.set('invalidated:' + tag, time.time(), self.replica_lag)
+        self._count('invalidations', len(tags))
+
+    def _count(self, counter, amount=1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def stats(self):
+        """Returns hit/miss counters and the current hit rate."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'invalidations': self.invalidations,
+            'replica_skips': self.replica_skips,
+            'entries': len(self.backend) if self.backend is not None else 0,
+        }
+
+
+class IdentityCache:
+    """Short-lived cache of model rows looked up by primary key.
+
+    Backs the Flask-Login user loader so authenticated requests skip the
+    ``SELECT user`` round trip. Only plain column values are cached, never
+    ORM objects; a hit is re-attached to the session without a query, so
+    relationships and identity comparisons keep working. Columns listed in
+    ``exclude`` are left unloaded and fetched only if accessed.
+
+    Callers must ``invalidate`` after committing changes to a cached row.
+
+    Attributes:
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that queried the database.
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        self.ttl = 30
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configures the backend from the app config."""
+        self.backend = make_backend(app.config, 'identity')
+        self.ttl = app.config.get('USER_CACHE_TTL', 30)
+        app.extensions['identity_cache'] = self
+
+    @staticmethod
+    def _key(model, ident):
+        return f'{model.__tablename__}:{ident}'
+
+    def get(self, session, model, ident, exclude=()):
+        """Returns the ``model`` row with primary key ``ident``, or None.
+
+        Args:
+            session (Session): Session the returned instance belongs to.
+            model (type): Mapped model class.
+            ident (int): Primary key value.
+            exclude (tuple): Column attributes never stored in the cache.
+
+        Returns:
+            object or None: A persistent instance attached to ``session``.
+        """
+        existing = session.identity_map.get(identity_key(model, ident))
+        if existing is not None:
+            return existing
+        data = self.backend.get(self._key(model, ident)) if self.ttl else None
+        if data is None:
+            self._count('misses')
+            obj = session.get(model, ident)
+            if obj is not None and self.ttl:
+                self.backend.set(self._key(model, ident), {
+                    attr.key: getattr(obj, attr.key)
+                    for attr in inspect(model).column_attrs if attr.key not in exclude
+                }, self.ttl)
+            return obj
+        self._count('hits')
+        obj = model(**data)
+        make_transient_to_detached(obj)
+        session.add(obj)
+        return obj
+
+    def invalidate(self, model, ident):
+        """Drops the cached row so the next lookup reads the database."""
+        self.backend.delete(self._key(model, ident))
+
+    def _count(self, counter, amount=1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def stats(self):
+        """Returns hit/miss counters and the current hit rate."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,175 @@
+import click
+from flask import Blueprint, current_app
+from flaskblog import db, home_timeline, mail, mail_queue, page_cache, static_assets, user_cache
+from flaskblog.assets import build_assets
+from flaskblog.database import sync_sqlite_replicas
+from flaskblog.export import EXPORTS, FORMATS, export
+from flaskblog.importer import PostImporter, iter_records
+from flaskblog.migrations import backfill_excerpts, reconcile_post_counts, upgrade
+from flaskblog.models import User
+from flaskblog.smtp_sink import FakeSMTPServer
+from flaskblog.templating import compile_templates
+
+# Registered with cli_group=None so commands appear as `flask <name>`.
+commands = Blueprint('commands', __name__, cli_group=None)
+
+
+def _warn_unshared_caches():
+    # In-process caches live in the web workers; this process cannot reach them.
+    if current_app.config.get('CACHE_BACKEND', 'memory') != 'redis':
+        click.echo("Warning: CACHE_BACKEND is not redis, so running web workers keep serving "
+                   "cached pages, users and timelines until they expire or the workers restart.",
+                   err=True)
+
+
+@commands.cli.command('upgrade-db')
+def upgrade_db():
+    """Create missing tables and apply pending schema migrations.
+
+    Safe to run repeatedly and against a populated database: nothing is
+    dropped, and migrations already recorded are skipped.
+    """
+    applied = upgrade()
+    for version, description in applied:
+        click.echo(f"Applied migration {version}: {description}")
+    click.echo("Database schema is up to date")
+
+
+@commands.cli.command('sync-replicas')
+def sync_replicas():
+    """Copy the primary SQLite database over the SQLite read replicas.
+
+    For trying replica routing locally; real replicas are kept up to date
+    by the database server's own replication.
+    """
+    try:
+        synced = sync_sqlite_replicas(db)
+    except ValueError as exc:
+        raise click.ClickException(str(exc))
+    click.echo(f"Synced {len(synced)} replicas" + (f": {', '.join(synced)}" if synced else ""))
+
+
+@commands.cli.command('backfill-excerpts')
+@click.option('--batch-size', default=1000, show_default=True, help='Posts updated per transaction.')
+@click.option('--all', 'recompute', is_flag=True, help='Recompute every post, not only missing ones.')
+def backfill_excerpts_command(batch_size, recompute):
+    """Compute the feed excerpt and word count of existing posts."""
+    def report(updated, rate):
+        click.echo(f"{updated:>10,} updated {rate:>10,.0f} rows/s", err=True)
+
+    updated = backfill_excerpts(batch_size=batch_size, recompute=recompute, progress=report)
+    if updated:
+        page_cache.invalidate('feed')
+        home_timeline.invalidate()
+        _warn_unshared_caches()
+    click.echo(f"Backfilled {updated:,} posts")
+
+
+@commands.cli.command('reconcile-post-counts')
+def reconcile_post_counts_command():
+    """Recompute users' post counts and last-posted times from their posts."""
+    corrected = reconcile_post_counts()
+    for user_id in corrected:
+        user_cache.invalidate(User, user_id)
+    if corrected:
+        page_cache.invalidate(*(f'author:{user_id}' for user_id in corrected))
+        _warn_unshared_caches()
+    click.echo(f"Corrected the post counters of {len(corrected):,} users")
+
+
+@commands.cli.command('import-posts')
+@click.argument('source', type=click.File('r', encoding='utf-8'), default='posts.json')
+@click.option('--batch-size', default=5000, show_default=True, help='Rows inserted per transaction.')
+@click.option('--default-user', type=int, help='Author id for records without a user_id.')
+def import_posts(source, batch_size, default_user):
+    """Bulk-import posts from a JSON array or JSON Lines file ("-" for stdin).
+
+    Records need ``title`` and ``content``, and may carry ``user_id`` and
+    ``date_posted`` (ISO 8601). Posts whose title already exists, in the
+    database or earlier in the file, are skipped.
+    """
+    def report(importer):
+        click.echo(f"{importer.read:>10,} read {importer.inserted:>10,} inserted "
+                   f"{importer.rate:>10,.0f} rows/s", err=True)
+
+    importer = PostImporter(batch_size=batch_size, default_user_id=default_user, progress=report)
+    importer.run(iter_records(source))
+    if importer.inserted:
+        page_cache.invalidate('feed', *(f'timeline:{user_id}' for user_id in importer.authors))
+        home_timeline.invalidate()
+        _warn_unshared_caches()
+    click.echo(f"Imported {importer.inserted:,} posts ({importer.duplicates:,} duplicates, "
+               f"{importer.invalid:,} invalid) at {importer.rate:,.0f} rows/s")
+
+
+@commands.cli.command('export')
+@click.argument('kind', type=click.Choice(sorted(EXPORTS)))
+@click.option('--format', 'fmt', type=click.Choice(sorted(FORMATS)), default='jsonl', show_default=True)
+@click.option('--author', help='Only posts by this username.')
+@click.option('--since', type=click.DateTime(), help='Only posts published at or after this date.')
+@click.option('--until', type=click.DateTime(), help='Only posts published before this date.')
+@click.option('-o', '--output', type=click.File('w', encoding='utf-8'), default='-',
+              help='Output file (default: stdout).')
+def export_command(kind, fmt, author, since, until, output):
+    """Stream all posts or users as JSON Lines or CSV in constant memory."""
+    filters = {'author': author, 'since': since, 'until': until} if kind == 'posts' else {}
+    for chunk in export(kind, fmt, **filters):
+        output.write(chunk)
+
+
+@commands.cli.command('precompile-templates')
+@click.option('--clear', is_flag=True, help='Remove existing cache entries first.')
+def precompile_templates(clear):
+    """Compile every template into the shared Jinja bytecode cache.
+
+    Run once per deploy, before starting the workers, so none of them
+    compiles templates while serving requests.
+    """
+    cache = current_app.jinja_env.bytecode_cache
+    if cache is None:
+        raise click.ClickException("The bytecode cache is disabled (TEMPLATE_CACHE_DIR is empty)")
+    if clear:
+        cache.clear()
+    names = compile_templates(current_app)
+    click.echo(f"Compiled {len(names)} templates into {cache.directory}")
+
+
+@commands.cli.command('build-assets')
+@click.option('--clear', is_flag=True, help='Delete earlier builds first.')
+def build_assets_command(clear):
+    """Fingerprint and precompress the static files.
+
+    Run once per deploy, before starting the workers; they read the
+    manifest at startup.
+    """
+    built = build_assets(current_app.static_folder, clear=clear)
+    static_assets.load_manifest()
+    for name, asset in sorted(built.items()):
+        encodings = ', '.join(asset['encodings']) or 'uncompressed'
+        click.echo(f"{name} -> {asset['path']} ({encodings})")
+    click.echo(f"Built {len(built)} assets")
+
+
+@commands.cli.command('mail-worker')
+@click.option('--once', is_flag=True, help='Exit when no job is due instead of polling.')
+@click.option('--interval', default=1.0, show_default=True, help='Seconds to sleep when idle.')
+def mail_worker(once, interval):
+    """Deliver queued mail, batching messages per SMTP connection."""
+    sent, failed = mail_queue.run_worker(mail, interval=interval, once=once)
+    click.echo(f"Sent {sent} messages, {failed} failed attempts")
+
+
+@commands.cli.command('smtp-sink')
+@click.option('--host', default='127.0.0.1', show_default=True)
+@click.option('--port', default=1025, show_default=True)
+def smtp_sink(host, port):
+    """Run a fake SMTP server that prints messages instead of sending them."""
+    def echo(mail_from, rcpt_tos, data):
+        click.echo(f"--- {mail_from} -> {', '.join(rcpt_tos)}\n{data.decode('utf-8', 'replace')}")
+
+    sink = FakeSMTPServer(host, port, on_message=echo)
+    click.echo(f"Fake SMTP sink listening on {sink.host}:{sink.port} (Ctrl+C to stop)")
+    try:
+        sink.serve_forever()
+    except KeyboardInterrupt:
+        sink.stop()
@@ -0,0 +1,68 @@
+import gzip
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # Optional; gzip is always available.
+    brotli = None
+
+# Bodies smaller than this are sent as is; compressing them rarely pays off.
+MIN_SIZE = 500
+
+
+def available_encodings():
+    """Returns the content codings this server can produce, best first."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate_encoding(accept_encodings, available=None):
+    """Picks the content coding to use for a request.
+
+    Args:
+        accept_encodings (Accept): The request's parsed ``Accept-Encoding``.
+        available (tuple, optional): Codings to choose from, best first.
+            Defaults to :func:`available_encodings`.
+
+    Returns:
+        str or None: "br", "gzip", or None to send the body uncompressed.
+    """
+    best, best_quality = None, 0
+    for encoding in available or available_encodings():
+        quality = accept_encodings.quality(encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data, encoding):
+    """Compresses ``data`` with ``encoding`` ("br" or "gzip")."""
+    if encoding == 'br':
+        return brotli.compress(data, quality=5)
+    return gzip.compress(data, compresslevel=6)
+
+
+def compress_response(response):
+    """Compresses a buffered response body according to ``Accept-Encoding``.
+
+    Meant for ``after_request`` hooks. Streamed, already encoded, error and
+    small responses are passed through untouched.
+
+    Args:
+        response (Response): The response to compress.
+
+    Returns:
+        Response: The same response, for chaining.
+    """
+    response.vary.add('Accept-Encoding')
+    if (response.status_code != 200 or response.is_streamed or response.direct_passthrough
+            or 'Content-Encoding' in response.headers):
+        return response
+    data = response.get_data()
+    if len(data) < MIN_SIZE:
+        return response
+    encoding = negotiate_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+    response.set_data(compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
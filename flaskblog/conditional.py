@@ -0,0 +1,94 @@
+import hashlib
+from flask import request, session, make_response
+from flask_login import current_user
+
+
+def make_etag(*parts):
+    """Builds an entity tag from the values a response depends on.
+
+    Args:
+        *parts: Values identifying the exact content, e.g. ids and versions.
+
+    Returns:
+        str: Hex digest suitable for ``Response.set_etag``.
+    """
+    raw = '|'.join('' if part is None else str(part) for part in parts)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def viewer_key():
+    """Identifies the viewer, since pages differ for authors and visitors."""
+    return current_user.get_id() if current_user.is_authenticated else 'anonymous'
+
+
+def post_etag(post):
+    """Returns the entity tag of a post page for the current viewer.
+
+    Includes the stored view count, which changes at most once per
+    ``VIEW_FLUSH_INTERVAL``, so revalidating clients see it move. Post
+    pages carry no ``Last-Modified``: view flushes leave ``updated_at``
+    alone, so a date validator would keep answering 304 with a stale count.
+    """
+    author = post.author
+    return make_etag('post', post.id, post.updated_at or post.date_posted, post.views,
+                     author.id, author.username, author.image_file, viewer_key())
+
+
+def feed_etag(page):
+    """Returns the entity tag of a page of posts for the current viewer.
+
+    Covers every post and author shown, their stored view counts and the
+    paging links, so adding, editing or deleting a post on the page, or a
+    flush of its views, changes it.
+    """
+    parts = ['feed', getattr(page, 'has_prev', None), getattr(page, 'has_next', None),
+             getattr(page, 'total', None), viewer_key()]
+    for post in page.items:
+        parts += [post.id, post.updated_at or post.date_posted, post.views,
+                  post.author.username, post.author.image_file]
+    return make_etag(*parts)
+
+
+def not_modified(etag, last_modified=None):
+    """Returns a 304 response if the request's validators still match.
+
+    ``If-None-Match`` takes precedence over ``If-Modified-Since``, as in
+    RFC 9110. Requests with pending flash messages always get a full page.
+
+    Args:
+        etag (str): Current entity tag of the resource.
+        last_modified (datetime, optional): Current modification time.
+
+    Returns:
+        Response or None: A 304 response, or None if the page must be rendered.
+    """
+    if '_flashes' in session:
+        return None
+    if request.if_none_match:
+        matched = request.if_none_match.contains_weak(etag)
+    elif request.if_modified_since and last_modified is not None:
+        matched = last_modified <= request.if_modified_since
+    else:
+        matched = False
+    if not matched:
+        return None
+    return with_validators(make_response('', 304), etag, last_modified)
+
+
+def with_validators(response, etag, last_modified=None):
+    """Adds ``ETag``/``Last-Modified`` and revalidation headers to a response.
+
+    Args:
+        response (Response): The response to decorate.
+        etag (str): Entity tag of the content.
+        last_modified (datetime, optional): Modification time of the content.
+
+    Returns:
+        Response: The same response, for chaining.
+    """
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    response.vary.add('Cookie')
+    return response
@@ -1,5 +1,6 @@
 import os
 from dotenv import load_dotenv
+from flaskblog.database import engine_options, replica_binds
 
 load_dotenv()
 
@@ -12,16 +13,159 @@ class Config:
     Attributes:
         SECRET_KEY (str): Secret key for session and token encryption.
         SQLALCHEMY_DATABASE_URI (str): Database connection URI.
+        DB_POOL_SIZE (int): Connections kept open per process.
+        DB_MAX_OVERFLOW (int): Extra connections allowed when the pool is exhausted.
+        DB_POOL_TIMEOUT (float): Seconds to wait for a free connection before an error.
+        DB_POOL_RECYCLE (int): Seconds after which pooled connections are replaced.
+        DB_POOL_PRE_PING (bool): Test each connection on checkout (default on).
+        SQLALCHEMY_ENGINE_OPTIONS (dict): Engine options built from the DB_POOL_*
+            settings; pool sizing is skipped for in-memory SQLite.
+        SQLITE_JOURNAL_MODE (str): Journal mode applied to SQLite connections
+            (default "WAL"; empty to leave the database's own setting).
+        SQLITE_SYNCHRONOUS (str): SQLite synchronous level (default "NORMAL").
+        DATABASE_REPLICA_URIS (tuple): Read replica URIs (comma-separated in the
+            environment). Reads of GET requests are spread over them.
+        SQLALCHEMY_BINDS (dict): Replica binds ``replica1``, ``replica2``, ...
+            with the same DB_POOL_* settings as the primary.
+        REPLICA_STICKY_SECONDS (float): Seconds a client keeps reading from the
+            primary after a request of theirs wrote (default 10).
+        METRICS_ENABLED (bool): Record per-request metrics and serve /metrics.
+        METRICS_TOKEN (str): Bearer token required to read /metrics; the
+            endpoint returns 404 until one is set.
+        ADMIN_EMAILS (tuple): Lowercase emails of users allowed on /admin pages
+            (comma-separated in the environment).
         MAIL_SERVER (str): Email server hostname.
         MAIL_PORT (int): Port used for email server (default 587 for TLS).
-        MAIL_USE_TLS (bool): Enable TLS for email.
+        MAIL_USE_TLS (bool): Enable TLS for email (default on).
         MAIL_USERNAME (str): Email server login username.
         MAIL_PASSWORD (str): Email server login password.
+        MAIL_QUEUE_PATH (str): SQLite file of the outgoing mail queue
+            (default: instance/mail_queue.db).
+        MAIL_QUEUE_BATCH_SIZE (int): Messages sent per SMTP connection.
+        MAIL_QUEUE_MAX_ATTEMPTS (int): Delivery attempts before a job is marked dead.
+        MAIL_QUEUE_RETRY_DELAY (int): Seconds before the first retry; doubles per attempt.
+        FEED_PAGINATION (str): "cursor" for keyset pagination (default) or
+            "numbered" for classic page-number pagination.
+        SEARCH_BACKEND (str): "auto" (default) uses SQLite FTS5 when available,
+            "fts5" requires it (searches fail without ``post_fts``), "memory"
+            forces the in-process inverted index, which only suits a single
+            worker process.
+        SEARCH_CANDIDATE_LIMIT (int): Newest matches ranked per search query.
+        CACHE_BACKEND (str): "memory" (in-process LRU, default) or "redis".
+        CACHE_REDIS_URL (str): Redis URL used when CACHE_BACKEND is "redis".
+        CACHE_MAX_ENTRIES (int): Entry limit of the in-process LRU backend.
+        PAGE_CACHE_ENABLED (bool): Cache rendered pages for anonymous visitors.
+            Defaults to on only with CACHE_BACKEND "redis": with "memory" a
+            write invalidates the pages of its own worker only, and the
+            others serve stale pages for up to PAGE_CACHE_TTL.
+        PAGE_CACHE_TTL (int): Seconds a cached page may be served.
+        TIMELINE_ENABLED (bool): Serve the first feed pages from the materialized
+            home timeline. Shares CACHE_BACKEND; defaults to on only with
+            "redis", since per-process buffers miss other workers' writes.
+        TIMELINE_SIZE (int): Newest posts kept in the home timeline.
+        TIMELINE_MAX_AGE (int): Seconds before the home timeline is rebuilt from
+            the database (0: only on startup), bounding how long writes made
+            by other processes take to appear with the memory backend.
+        VIEW_COUNTS_ENABLED (bool): Count post page views (default on).
+        VIEW_FLUSH_INTERVAL (float): Seconds between batched writes of buffered
+            view counts.
+        VIEW_FLUSH_THRESHOLD (int): Buffered views per process that trigger an
+            early write.
+        USER_CACHE_TTL (int): Seconds the login user loader may reuse a cached
+            user row (0 disables the cache). Shares CACHE_BACKEND.
+        BCRYPT_LOG_ROUNDS (int): Bcrypt work factor; stored hashes with another
+            cost are upgraded on the next successful login.
+        PASSWORD_HASH_WORKERS (int): Hashing processes (0 hashes inline).
+        PASSWORD_HASH_QUEUE_SIZE (int): Maximum hashes queued or running at once.
+        PASSWORD_HASH_TIMEOUT (float): Seconds to wait for a hashing slot before a 503.
+        RATELIMIT_ENABLED (bool): Rate-limit the login, registration and
+            password reset endpoints (default on).
+        RATELIMIT_BACKEND (str): "memory" (per process, default) or "redis"
+            (shared by every worker).
+        RATELIMIT_REDIS_URL (str): Redis URL for the "redis" backend; defaults
+            to CACHE_REDIS_URL.
+        RATELIMIT_AUTH_PER_IP (str): Auth POSTs allowed per client IP, e.g. "20/minute".
+        RATELIMIT_AUTH_PER_ACCOUNT (str): Auth POSTs allowed per email, e.g. "5/minute".
+        AUTH_MAX_CONCURRENT (int): Auth POSTs handled at once by each worker
+            process, not across the deployment: with N workers up to N times
+            this many run at once. Further ones get a 429 immediately (0
+            disables the cap).
+        TRUSTED_PROXIES (int): Reverse proxies in front of the app whose
+            ``X-Forwarded-For``/``X-Forwarded-Proto`` headers are trusted
+            (default 0). Rate limits key on the client address they report.
+        IMAGE_WORKERS (int): Threads processing profile pictures (0 processes
+            them inline during the upload request).
+        PROFILE_PICTURE_SIZES (tuple): Square sizes, in pixels, rendered as
+            WebP and JPEG for every uploaded profile picture.
+        IMAGE_QUALITY (int): WebP/JPEG encoder quality.
+        STATIC_MAX_AGE (int): Cache lifetime, in seconds, of fingerprinted static
+            files and hash-named profile pictures (default one year).
+        TEMPLATE_CACHE_DIR (str): Directory of the shared Jinja bytecode cache
+            (default: instance/jinja_cache; empty to disable).
+        TEMPLATES_AUTO_RELOAD (bool): Check template files for changes on every
+            render; None (default) follows debug mode.
+        WARM_ON_START (bool): Compile every template and the URL matcher in
+            ``create_app`` instead of on first use.
     """
     SECRET_KEY = os.environ.get('SECRET_KEY')
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URI')
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', '1') == '1'
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(
+        SQLALCHEMY_DATABASE_URI, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT, pool_recycle=DB_POOL_RECYCLE, pool_pre_ping=DB_POOL_PRE_PING)
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    DATABASE_REPLICA_URIS = tuple(uri.strip() for uri in os.environ.get('DATABASE_REPLICA_URIS', '').split(',') if uri.strip())
+    SQLALCHEMY_BINDS = replica_binds(
+        DATABASE_REPLICA_URIS, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT, pool_recycle=DB_POOL_RECYCLE, pool_pre_ping=DB_POOL_PRE_PING)
+    REPLICA_STICKY_SECONDS = float(os.environ.get('REPLICA_STICKY_SECONDS', 10))
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    ADMIN_EMAILS = tuple(email.strip().lower() for email in os.environ.get('ADMIN_EMAILS', '').split(',') if email.strip())
     MAIL_SERVER = os.environ.get('MAIL_SERVER')
-    MAIL_PORT = 587
-    MAIL_USE_TLS = True
+    MAIL_PORT = int(os.environ.get('MAIL_PORT', 587))
+    MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS', '1') == '1'
     MAIL_USERNAME = os.environ.get('EMAIL_USER')
-    MAIL_PASSWORD = os.environ.get('EMAIL_PASSWORd')
\ No newline at end of file
+    MAIL_PASSWORD = os.environ.get('EMAIL_PASSWORd')
+    MAIL_QUEUE_PATH = os.environ.get('MAIL_QUEUE_PATH')
+    MAIL_QUEUE_BATCH_SIZE = int(os.environ.get('MAIL_QUEUE_BATCH_SIZE', 50))
+    MAIL_QUEUE_MAX_ATTEMPTS = int(os.environ.get('MAIL_QUEUE_MAX_ATTEMPTS', 5))
+    MAIL_QUEUE_RETRY_DELAY = int(os.environ.get('MAIL_QUEUE_RETRY_DELAY', 30))
+    FEED_PAGINATION = os.environ.get('FEED_PAGINATION', 'cursor')
+    SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND', 'auto')
+    SEARCH_CANDIDATE_LIMIT = int(os.environ.get('SEARCH_CANDIDATE_LIMIT', 1000))
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 2048))
+    PAGE_CACHE_ENABLED = {'1': True, '0': False}.get(os.environ.get('PAGE_CACHE_ENABLED'))
+    PAGE_CACHE_TTL = int(os.environ.get('PAGE_CACHE_TTL', 60))
+    TIMELINE_ENABLED = {'1': True, '0': False}.get(os.environ.get('TIMELINE_ENABLED'))
+    TIMELINE_SIZE = int(os.environ.get('TIMELINE_SIZE', 200))
+    TIMELINE_MAX_AGE = int(os.environ.get('TIMELINE_MAX_AGE', 60))
+    VIEW_COUNTS_ENABLED = os.environ.get('VIEW_COUNTS_ENABLED', '1') == '1'
+    VIEW_FLUSH_INTERVAL = float(os.environ.get('VIEW_FLUSH_INTERVAL', 5))
+    VIEW_FLUSH_THRESHOLD = int(os.environ.get('VIEW_FLUSH_THRESHOLD', 1000))
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 30))
+    BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+    PASSWORD_HASH_QUEUE_SIZE = int(os.environ.get('PASSWORD_HASH_QUEUE_SIZE', 4 * (os.cpu_count() or 1)))
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 5))
+    RATELIMIT_ENABLED = os.environ.get('RATELIMIT_ENABLED', '1') == '1'
+    RATELIMIT_BACKEND = os.environ.get('RATELIMIT_BACKEND', 'memory')
+    RATELIMIT_REDIS_URL = os.environ.get('RATELIMIT_REDIS_URL')
+    RATELIMIT_AUTH_PER_IP = os.environ.get('RATELIMIT_AUTH_PER_IP', '20/minute')
+    RATELIMIT_AUTH_PER_ACCOUNT = os.environ.get('RATELIMIT_AUTH_PER_ACCOUNT', '5/minute')
+    AUTH_MAX_CONCURRENT = int(os.environ.get('AUTH_MAX_CONCURRENT', 4 * (os.cpu_count() or 1)))
+    TRUSTED_PROXIES = int(os.environ.get('TRUSTED_PROXIES', 0))
+    IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', 2))
+    PROFILE_PICTURE_SIZES = tuple(int(size) for size in os.environ.get('PROFILE_PICTURE_SIZES', '64,125,250').split(','))
+    IMAGE_QUALITY = int(os.environ.get('IMAGE_QUALITY', 85))
+    STATIC_MAX_AGE = int(os.environ.get('STATIC_MAX_AGE', 31536000))
+    TEMPLATE_CACHE_DIR = os.environ.get('TEMPLATE_CACHE_DIR')
+    TEMPLATES_AUTO_RELOAD = {'1': True, '0': False}.get(os.environ.get('TEMPLATES_AUTO_RELOAD'))
+    WARM_ON_START = os.environ.get('WARM_ON_START', '0') == '1'
\ No newline at end of file
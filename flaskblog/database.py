@@ -0,0 +1,359 @@
+import threading
+import time
+from flask import current_app, has_app_context, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import TextClause, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+REPLICA_BIND_PREFIX = 'replica'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def is_sqlite_memory(uri):
+    """Returns True if ``uri`` names an in-memory SQLite database."""
+    if not uri:
+        return False
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def engine_options(uri, pool_size=5, max_overflow=10, pool_timeout=30,
+                   pool_recycle=1800, pool_pre_ping=True):
+    """Builds ``SQLALCHEMY_ENGINE_OPTIONS`` for the configured database.
+
+    Every database gets pre-ping and recycling. Queue-pool sizing is added
+    except for in-memory SQLite, which Flask-SQLAlchemy serves from a single
+    static connection.
+
+    Args:
+        uri (str): The database URI.
+        pool_size (int): Connections kept open in the pool.
+        max_overflow (int): Extra connections allowed beyond ``pool_size``.
+        pool_timeout (float): Seconds to wait for a free connection.
+        pool_recycle (int): Seconds after which connections are replaced.
+        pool_pre_ping (bool): Test connections on checkout.
+
+    Returns:
+        dict: Keyword arguments for ``create_engine``.
+    """
+    options = {'pool_pre_ping': pool_pre_ping, 'pool_recycle': pool_recycle}
+    if not is_sqlite_memory(uri):
+        options.update(poolclass=InstrumentedQueuePool, pool_size=pool_size,
+                       max_overflow=max_overflow, pool_timeout=pool_timeout)
+    return options
+
+
+def replica_binds(uris, **options):
+    """Builds ``SQLALCHEMY_BINDS`` entries for read replicas.
+
+    Flask-SQLAlchemy does not apply ``SQLALCHEMY_ENGINE_OPTIONS`` to binds,
+    so each replica gets its own pool options here.
+
+    Args:
+        uris (list): Replica database URIs.
+        **options: Pool settings passed to :func:`engine_options`.
+
+    Returns:
+        dict: Bind keys ``replica1``, ``replica2``, ... mapped to engine options.
+    """
+    return {f'{REPLICA_BIND_PREFIX}{number}': dict(engine_options(uri, **options), url=uri)
+            for number, uri in enumerate(uris, 1)}
+
+
+def _is_write(clause):
+    if clause is None:
+        return False
+    if isinstance(clause, TextClause):
+        return clause.text.lstrip()[:6].upper() not in ('SELECT', 'WITH')
+    return getattr(clause, 'is_dml', False)
+
+
+def sync_sqlite_replicas(db):
+    """Copies the primary SQLite database over every SQLite replica.
+
+    Stands in for replication when trying replicas locally with SQLite
+    files. Uses SQLite's online backup, so the primary may stay in use.
+    Must be called inside an application context.
+
+    Args:
+        db (SQLAlchemy): The database extension.
+
+    Returns:
+        list: Bind keys of the replicas overwritten.
+
+    Raises:
+        ValueError: If the primary is not SQLite.
+    """
+    if db.engine.dialect.name != 'sqlite':
+        raise ValueError("Only SQLite replicas can be synced from the primary")
+    synced = []
+    for key in sorted(filter(None, db.engines)):
+        replica = db.engines[key]
+        if not key.startswith(REPLICA_BIND_PREFIX) or replica.dialect.name != 'sqlite':
+            continue
+        source = db.engine.raw_connection()
+        target = replica.raw_connection()
+        try:
+            source.driver_connection.backup(target.driver_connection)
+        finally:
+            target.close()
+            source.close()
+        replica.dispose()
+        synced.append(key)
+    return synced
+
+
+class RoutingSession(Session):
+    """Session that sends reads to a replica when the app's router allows it.
+
+    Flushes and INSERT, UPDATE and DELETE statements always use the
+    primary; anything else is routed by the ``replica_router`` extension,
+    if installed.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context():
+            router = current_app.extensions.get('replica_router')
+            if router is not None:
+                engine = router.route(self, clause)
+                if engine is not None:
+                    return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'before_flush')
+def _route_flush_to_primary(db_session, flush_context, instances):
+    # Runs before the flush asks for a bind, so it and every later read use the primary.
+    db_session.info['replica_wrote'] = True
+
+
+class InstrumentedQueuePool(QueuePool):
+    """``QueuePool`` that records how long checkouts wait for a connection.
+
+    Attributes:
+        checkouts (int): Connections handed out.
+        wait_seconds (float): Total time spent in checkout, waiting for a free
+            connection or opening a new one.
+        max_wait_seconds (float): Longest single checkout.
+        overflow_events (int): Checkouts that had to open an overflow connection.
+        timeouts (int): Checkouts that gave up after ``pool_timeout``.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self._local = threading.local()
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.overflow_events = 0
+        self.timeouts = 0
+
+    def _do_get(self):
+        # QueuePool._do_get retries by calling itself; only time the outer call.
+        if getattr(self._local, 'active', False):
+            return super()._do_get()
+        self._local.active = True
+        overflow = self.overflow()
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            self._local.active = False
+        waited = time.perf_counter() - started
+        with self._stats_lock:
+            self.checkouts += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+            if self.overflow() > max(overflow, 0):
+                self.overflow_events += 1
+        return connection
+
+
+class PoolMonitor:
+    """Reports connection pool usage and tunes SQLite connections.
+
+    For SQLite file databases every new connection gets
+    ``PRAGMA journal_mode`` (WAL by default, so readers do not block the
+    writer) and ``PRAGMA synchronous`` (NORMAL, which is durable in WAL
+    mode apart from the last transactions on power loss).
+
+    Configuration:
+        SQLITE_JOURNAL_MODE (str): Journal mode for SQLite files, or "" to leave it.
+        SQLITE_SYNCHRONOUS (str): Synchronous level for SQLite, or "" to leave it.
+    """
+
+    def __init__(self, app=None, db=None):
+        self.db = db
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        """Installs the SQLite pragmas on the app's engines."""
+        self.db = db
+        journal_mode = app.config.get('SQLITE_JOURNAL_MODE', 'WAL')
+        synchronous = app.config.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+        with app.app_context():
+            engines = list(db.engines.values())
+        for engine in engines:
+            if engine.dialect.name != 'sqlite':
+                continue
+            pragmas = []
+            if journal_mode and not is_sqlite_memory(str(engine.url)):
+                pragmas.append(f'PRAGMA journal_mode={journal_mode}')
+            if synchronous:
+                pragmas.append(f'PRAGMA synchronous={synchronous}')
+            if pragmas:
+                event.listen(engine, 'connect', _pragma_setter(pragmas))
+        app.extensions['pool_monitor'] = self
+
+    def stats(self):
+        """Returns live pool counters for the current app's engine."""
+        pool = self.db.engine.pool
+        stats = {'pool': type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            stats.update(size=pool.size(), checked_out=pool.checkedout(),
+                         checked_in=pool.checkedin(), overflow=max(pool.overflow(), 0))
+        if isinstance(pool, InstrumentedQueuePool):
+            stats.update(checkouts=pool.checkouts, wait_seconds=pool.wait_seconds,
+                         max_wait_seconds=pool.max_wait_seconds,
+                         overflow_events=pool.overflow_events, timeouts=pool.timeouts)
+        return stats
+
+
+class ReplicaRouter:
+    """Routes the reads of safe requests to read replicas.
+
+    Replicas are the ``SQLALCHEMY_BINDS`` whose key starts with
+    ``replica``. Within a GET, HEAD or OPTIONS request, the session reads
+    from one replica, picked round-robin per request. Everything else uses
+    the primary:
+
+    - requests with other methods
+    - writes, and every statement after the first write in the same request
+    - requests outside a request context (CLI commands, workers)
+    - for ``REPLICA_STICKY_SECONDS`` after a request of the same client
+      wrote, so users read their own writes while replicas catch up
+
+    Stickiness is kept in the signed session cookie, so it follows the
+    client across worker processes. Pages read from a replica shortly
+    after a write invalidated them are not stored in the page cache, which
+    would otherwise keep serving the pre-write content to everyone.
+
+    Configuration:
+        REPLICA_STICKY_SECONDS (float): How long a client reads from the
+            primary after it wrote (0 disables stickiness).
+
+    Attributes:
+        replica_requests (int): Requests that read from a replica.
+        sticky_requests (int): Safe requests kept on the primary by stickiness.
+        write_requests (int): Requests that wrote to the primary.
+    """
+
+    def __init__(self, app=None, db=None):
+        self.db = db
+        self.replicas = []
+        self.sticky_seconds = 0
+        self.replica_requests = 0
+        self.sticky_requests = 0
+        self.write_requests = 0
+        self._next = 0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        """Finds the replica engines and installs the stickiness hooks."""
+        self.db = db
+        self.sticky_seconds = app.config.get('REPLICA_STICKY_SECONDS', 10)
+        with app.app_context():
+            self.replicas = [db.engines[key] for key in sorted(filter(None, db.engines))
+                             if key.startswith(REPLICA_BIND_PREFIX)]
+        app.extensions['replica_router'] = self
+        if self.replicas:
+            app.before_request(self._start_request)
+            app.after_request(self._finish_request)
+
+    def route(self, db_session, clause=None):
+        """Chooses the engine for a statement.
+
+        Args:
+            db_session (Session): The session executing it.
+            clause (ClauseElement, optional): The statement.
+
+        Returns:
+            Engine or None: A replica engine, or None for the primary.
+        """
+        info = db_session.info
+        if _is_write(clause):
+            info['replica_wrote'] = True
+            return None
+        if info.get('replica_wrote') or not self.replicas or not has_request_context():
+            return None
+        if 'replica' not in info:
+            info['replica'] = self._pick() if self._reads_replica() else None
+        return info['replica']
+
+    def served_replica(self):
+        """Returns True if the current request has read from a replica."""
+        return (self.db is not None and self.db.session.registry.has()
+                and self.db.session.info.get('replica') is not None)
+
+    def _reads_replica(self):
+        if request.method not in SAFE_METHODS:
+            return False
+        if session.get('_primary_until', 0) > time.time():
+            self._count('sticky_requests')
+            return False
+        self._count('replica_requests')
+        return True
+
+    def _pick(self):
+        with self._lock:
+            engine = self.replicas[self._next % len(self.replicas)]
+            self._next += 1
+            return engine
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _start_request(self):
+        # The session is scoped to the app context, which a request may share
+        # with the code around it (e.g. tests); start each request afresh.
+        if self.db.session.registry.has():
+            self.db.session.info.pop('replica', None)
+            self.db.session.info.pop('replica_wrote', None)
+
+    def _finish_request(self, response):
+        if self.db.session.registry.has() and self.db.session.info.get('replica_wrote'):
+            self._count('write_requests')
+            if self.sticky_seconds:
+                session['_primary_until'] = time.time() + self.sticky_seconds
+        return response
+
+    def stats(self):
+        """Returns routing counters."""
+        return {
+            'replicas': len(self.replicas),
+            'replica_requests': self.replica_requests,
+            'sticky_requests': self.sticky_requests,
+            'write_requests': self.write_requests,
+        }
+
+
+def _pragma_setter(pragmas):
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+    return set_pragmas
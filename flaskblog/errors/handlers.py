@@ -26,6 +26,21 @@ def error_403(error):
     """
     return render_template('errors/403.html'), 403
 
+@errors.app_errorhandler(429)
+def error_429(error):
+    """Handle 429 Too Many Requests errors.
+    Raised by the rate limiter on login, registration and password reset.
+    Args:
+        error (Exception): The error that occurred.
+    Returns:
+        Response: Rendered template for the 429 error page with a 429
+        status code, keeping the ``Retry-After`` header.
+    """
+    headers = {}
+    if getattr(error, 'retry_after', None):
+        headers['Retry-After'] = str(error.retry_after)
+    return render_template('errors/429.html', error=error), 429, headers
+
 @errors.app_errorhandler(500)
 def error_500(error):
     """Handle 500 Internal Server Error.
@@ -36,4 +51,16 @@ def error_500(error):
         Response: Rendered template for the
         500 error page with a 500 status code.
     """
-    return render_template('errors/500.html'), 500
\ No newline at end of file
+    return render_template('errors/500.html'), 500
+
+@errors.app_errorhandler(503)
+def error_503(error):
+    """Handle 503 Service Unavailable errors.
+    Raised when the password hashing queue is saturated.
+    Args:
+        error (Exception): The error that occurred.
+    Returns:
+        Response: Rendered template for the
+        503 error page with a 503 status code.
+    """
+    return render_template('errors/503.html'), 503
\ No newline at end of file
@@ -0,0 +1,121 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from sqlalchemy import select
+from flaskblog import db
+from flaskblog.models import Post, User
+
+# Columns exported per table. User passwords are never exported.
+EXPORTS = {
+    'posts': (Post.id, Post.title, Post.content, Post.date_posted, Post.updated_at,
+              Post.user_id, User.username.label('author')),
+    'users': (User.id, User.username, User.email, User.image_file, User.updated_at),
+}
+
+FORMATS = {
+    'jsonl': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def export_query(kind, author=None, since=None, until=None):
+    """Builds the export query for ``kind``.
+
+    Args:
+        kind (str): "posts" or "users".
+        author (str, optional): Only posts by this username.
+        since (datetime, optional): Only posts published at or after this time.
+        until (datetime, optional): Only posts published before this time.
+
+    Returns:
+        Select: Query ordered by primary key.
+    """
+    columns = EXPORTS[kind]
+    query = select(*columns)
+    if kind == 'posts':
+        query = query.join(User, Post.user_id == User.id)
+        if author:
+            query = query.where(User.username == author)
+        if since:
+            query = query.where(Post.date_posted >= since)
+        if until:
+            query = query.where(Post.date_posted < until)
+        return query.order_by(Post.id)
+    return query.order_by(User.id)
+
+
+def stream_rows(query, batch_size=2000):
+    """Yields result rows as dicts without buffering the whole result.
+
+    ``yield_per`` enables server-side cursors where the driver supports
+    them, so only one batch of plain rows is in memory at a time.
+    """
+    result = db.session.execute(query.execution_options(yield_per=batch_size))
+    keys = list(result.keys())
+    for row in result:
+        yield dict(zip(keys, row))
+
+
+def _chunked(lines, chunk_size):
+    buffer, size = [], 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def _jsonl_lines(rows):
+    encode = json.JSONEncoder(default=_json_default, ensure_ascii=False).encode
+    for row in rows:
+        yield encode(row) + '\n'
+
+
+def _csv_lines(rows, fields):
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(fields)
+    for row in rows:
+        writer.writerow([value.isoformat() if isinstance(value, datetime) else value
+                         for value in row.values()])
+        yield out.getvalue()
+        out.seek(0)
+        out.truncate()
+    if out.tell():
+        yield out.getvalue()
+
+
+def export(kind, fmt='jsonl', chunk_size=64 * 1024, **filters):
+    """Streams a table export as text chunks.
+
+    Memory use is bounded by one fetch batch plus one output chunk, however
+    many rows are exported, so the generator can feed a file or a streamed
+    HTTP response directly. Must be consumed inside an app context.
+
+    Args:
+        kind (str): "posts" or "users".
+        fmt (str): "jsonl" or "csv".
+        chunk_size (int): Approximate characters per yielded chunk.
+        **filters: ``author``, ``since`` and ``until`` for posts.
+
+    Yields:
+        str: Consecutive pieces of the export.
+    """
+    query = export_query(kind, **filters)
+    rows = stream_rows(query)
+    if fmt == 'csv':
+        fields = [column.key for column in EXPORTS[kind]]
+        lines = _csv_lines(rows, fields)
+    else:
+        lines = _jsonl_lines(rows)
+    return _chunked(lines, chunk_size)
@@ -0,0 +1,155 @@
+import os
+import threading
+import time
+import bcrypt as _bcrypt
+from werkzeug.exceptions import ServiceUnavailable
+
+# bcrypt only reads this many bytes of a password; bcrypt 5 refuses longer ones.
+MAX_PASSWORD_BYTES = 72
+
+
+def _hash_password(password, rounds):
+    return _bcrypt.hashpw(password, _bcrypt.gensalt(rounds))
+
+
+def _check_password(password, hashed):
+    return _bcrypt.checkpw(password, hashed)
+
+
+class HashingOverloaded(ServiceUnavailable):
+    """Raised when no hashing slot frees up within ``PASSWORD_HASH_TIMEOUT``."""
+
+    description = "The server is busy. Please try again in a moment."
+
+
+class PasswordHasher:
+    """Bcrypt hashing service backed by a bounded process pool.
+
+    Hashes run in worker processes so they use every core instead of
+    contending for the GIL in the web worker. At most
+    ``PASSWORD_HASH_QUEUE_SIZE`` hashes may be queued or running; further
+    callers wait up to ``PASSWORD_HASH_TIMEOUT`` seconds for a slot and then
+    get a 503, which keeps latency predictable under a login storm.
+
+    Configuration:
+        BCRYPT_LOG_ROUNDS (int): Work factor for new hashes (default 12).
+        PASSWORD_HASH_WORKERS (int): Pool size; 0 hashes inline on the
+            request thread (default: number of CPUs).
+        PASSWORD_HASH_QUEUE_SIZE (int): Maximum queued plus running hashes.
+        PASSWORD_HASH_TIMEOUT (float): Seconds to wait for a free slot.
+
+    Attributes:
+        pending (int): Hashes currently queued or running.
+        completed (int): Hashes finished since startup.
+        rejected (int): Calls refused because the queue stayed full.
+    """
+
+    def __init__(self, app=None):
+        self.rounds = 12
+        self.workers = 0
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.busy_seconds = 0.0
+        self._slots = None
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pool_pid = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Reads the hashing configuration from the app."""
+        self.rounds = app.config.get('BCRYPT_LOG_ROUNDS', 12)
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 1)
+        self.max_pending = app.config.get('PASSWORD_HASH_QUEUE_SIZE', max(self.workers, 1) * 4)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', 5.0)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        app.extensions['password_hasher'] = self
+
+    def _executor(self):
+        # Imported here: multiprocessing is only needed once a hash is requested.
+        from concurrent.futures import ProcessPoolExecutor
+
+        # Pools do not survive fork, so each worker process starts its own.
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def _run(self, func, *args):
+        if not self.workers:
+            return func(*args)
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self.rejected += 1
+            raise HashingOverloaded()
+        with self._lock:
+            self.pending += 1
+        started = time.perf_counter()
+        try:
+            return self._executor().submit(func, *args).result()
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+                self.busy_seconds += time.perf_counter() - started
+            self._slots.release()
+
+    def generate_password_hash(self, password):
+        """Hashes ``password`` with the configured work factor.
+
+        Args:
+            password (str): Plain-text password.
+
+        Returns:
+            str: The bcrypt hash, ready to store in ``User.password``.
+
+        Raises:
+            ValueError: If ``password`` is longer than ``MAX_PASSWORD_BYTES``
+                once encoded; forms reject such passwords first.
+        """
+        encoded = password.encode('utf-8')
+        if len(encoded) > MAX_PASSWORD_BYTES:
+            raise ValueError(f"Passwords are limited to {MAX_PASSWORD_BYTES} bytes")
+        return self._run(_hash_password, encoded, self.rounds).decode('utf-8')
+
+    def check_password_hash(self, hashed, password):
+        """Checks ``password`` against a stored bcrypt hash.
+
+        Args:
+            hashed (str): Hash stored in ``User.password``.
+            password (str): Plain-text password to verify.
+
+        Returns:
+            bool: True if the password matches; always False for passwords
+            too long to have been hashed.
+        """
+        encoded = password.encode('utf-8')
+        if len(encoded) > MAX_PASSWORD_BYTES:
+            return False
+        try:
+            return self._run(_check_password, encoded, hashed.encode('utf-8'))
+        except ValueError:
+            # Not a bcrypt hash, e.g. a placeholder password from seed data.
+            return False
+
+    def needs_rehash(self, hashed):
+        """Returns True if ``hashed`` uses a different work factor than configured."""
+        try:
+            return int(hashed.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return False
+
+    def stats(self):
+        """Returns queue-depth and throughput counters."""
+        return {
+            'workers': self.workers,
+            'rounds': self.rounds,
+            'pending': self.pending,
+            'max_pending': getattr(self, 'max_pending', 0),
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'busy_seconds': self.busy_seconds,
+        }
@@ -0,0 +1,237 @@
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from flask import current_app, url_for
+
+# Size of the canonical "<hash>.jpg" stored in User.image_file.
+DISPLAY_SIZE = 125
+
+
+@lru_cache(maxsize=4096)
+def _has_variants(directory, image_file, size):
+    # Processed files are content-addressed and never change, so the answer
+    # for a given name is stable; legacy uploads simply have no variants.
+    stem, _ = os.path.splitext(image_file)
+    return os.path.exists(os.path.join(directory, f'{stem}-{size}.webp'))
+
+
+def _flatten(image):
+    """Returns an RGB copy of ``image``, compositing transparency onto white."""
+    from PIL import Image
+
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+class ImagePipeline:
+    """Processes uploaded profile pictures off the request path.
+
+    ``submit`` only hashes the upload and checks its structure; decoding and
+    resizing run on a thread pool (Pillow releases the GIL while it works).
+    Each picture is stored once per content hash as square WebP and JPEG
+    variants in ``PROFILE_PICTURE_SIZES`` plus a canonical ``<hash>.jpg``,
+    so identical uploads share files and re-uploading is free. JPEGs are
+    decoded with ``Image.draft``, which lets libjpeg downscale by up to 8x
+    while decoding instead of building the full-size bitmap.
+
+    Until processing finishes the user keeps their current picture
+    (``default.jpg`` for new accounts); the worker then updates
+    ``User.image_file`` and invalidates the cached user and their pages.
+
+    Attributes:
+        processed (int): Pictures decoded and written.
+        deduplicated (int): Uploads that matched an existing picture.
+        failed (int): Uploads that could not be processed.
+    """
+
+    def __init__(self, app=None):
+        self.directory = None
+        self.sizes = (64, 125, 250)
+        self.workers = 2
+        self.processed = 0
+        self.deduplicated = 0
+        self.failed = 0
+        self._latest = {}
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pool_pid = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Reads the image configuration from the app."""
+        self.directory = os.path.join(app.root_path, 'static', 'profile_pics')
+        self.sizes = tuple(sorted(set(app.config.get('PROFILE_PICTURE_SIZES', self.sizes))))
+        self.workers = app.config.get('IMAGE_WORKERS', 2)
+        self.quality = app.config.get('IMAGE_QUALITY', 85)
+        app.add_template_global(self.picture_sources, 'profile_picture')
+        app.extensions['images'] = self
+
+    def _executor(self):
+        # Threads do not survive fork, so each worker process starts its own pool.
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ThreadPoolExecutor(max_workers=self.workers,
+                                                thread_name_prefix='image-worker')
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _path(self, filename):
+        return os.path.join(self.directory, filename)
+
+    def submit(self, user_id, upload):
+        """Queues an uploaded picture for processing.
+
+        Args:
+            user_id (int): The user the picture belongs to.
+            upload (FileStorage): The uploaded file.
+
+        Returns:
+            str or None: The picture's filename if it is already available
+            (identical upload or inline processing), else None.
+
+        Raises:
+            ValueError: If the upload is not a readable image, including
+                truncated or corrupt files.
+        """
+        # Pillow is imported on first upload; most processes never need it.
+        from PIL import Image
+
+        data = upload.read()
+        try:
+            # Parses the header and checks the file's structure (e.g. PNG chunk
+            # checksums); pixel data is decoded by the worker.
+            with Image.open(io.BytesIO(data)) as image:
+                image_format = image.format
+                image.verify()
+        except (OSError, SyntaxError, Image.DecompressionBombError) as e:
+            # Truncated or corrupt files raise OSError, some decoders SyntaxError.
+            raise ValueError('Unsupported image') from e
+        digest = hashlib.sha256(data).hexdigest()[:16]
+        filename = digest + '.jpg'
+        if os.path.exists(self._path(filename)) or not self.workers:
+            with self._lock:
+                # Supersedes any upload still being processed for this user.
+                self._latest.pop(user_id, None)
+            if os.path.exists(self._path(filename)):
+                self._count('deduplicated')
+                return filename
+            try:
+                return self.process(data, digest, image_format)
+            except (OSError, SyntaxError, Image.DecompressionBombError) as e:
+                self._count('failed')
+                raise ValueError('Unsupported image') from e
+        with self._lock:
+            self._latest[user_id] = filename
+        app = current_app._get_current_object()
+        self._executor().submit(self._run, app, user_id, data, digest, image_format)
+        return None
+
+    def process(self, data, digest, image_format=None):
+        """Decodes an image and writes every variant for ``digest``.
+
+        Args:
+            data (bytes): The uploaded file.
+            digest (str): Content hash naming the output files.
+            image_format (str, optional): Format detected by ``submit``.
+
+        Returns:
+            str: The canonical ``<digest>.jpg`` filename.
+        """
+        from PIL import Image, ImageOps
+
+        largest = max(self.sizes + (DISPLAY_SIZE,))
+        with Image.open(io.BytesIO(data)) as image:
+            if image_format == 'JPEG':
+                image.draft('RGB', (largest, largest))
+            image = _flatten(ImageOps.exif_transpose(image))
+        for size in sorted(self.sizes, reverse=True):
+            variant = ImageOps.fit(image, (size, size), Image.LANCZOS)
+            self._save(variant, f'{digest}-{size}.webp', 'WEBP')
+            self._save(variant, f'{digest}-{size}.jpg', 'JPEG')
+        # Written last: its existence marks the picture as complete.
+        filename = digest + '.jpg'
+        self._save(ImageOps.fit(image, (DISPLAY_SIZE, DISPLAY_SIZE), Image.LANCZOS),
+                   filename, 'JPEG')
+        self._count('processed')
+        return filename
+
+    def _save(self, image, filename, image_format):
+        path = self._path(filename)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        image.save(tmp_path, image_format, quality=self.quality, optimize=image_format == 'JPEG')
+        os.replace(tmp_path, path)
+
+    def _run(self, app, user_id, data, digest, image_format):
+        try:
+            filename = self.process(data, digest, image_format)
+        except Exception:
+            self._count('failed')
+            with self._lock:
+                if self._latest.get(user_id) == digest + '.jpg':
+                    del self._latest[user_id]
+            app.logger.exception("Processing profile picture for user %s failed", user_id)
+            return
+        with app.app_context():
+            self._assign(user_id, filename)
+
+    def _assign(self, user_id, filename):
+        from flaskblog import db, home_timeline, page_cache, user_cache
+        from flaskblog.models import User
+
+        with self._lock:
+            if self._latest.get(user_id) != filename:
+                return  # A newer upload superseded this one.
+            del self._latest[user_id]
+        try:
+            user = db.session.get(User, user_id)
+            if user is None:
+                return
+            user.image_file = filename
+            db.session.commit()
+            home_timeline.update_author(user)
+        finally:
+            db.session.remove()
+        user_cache.invalidate(User, user_id)
+        page_cache.invalidate(f'author:{user_id}')
+
+    def picture_sources(self, image_file):
+        """Returns the URLs of a profile picture for templates.
+
+        Args:
+            image_file (str): Value of ``User.image_file``.
+
+        Returns:
+            dict: ``src`` plus ``jpeg`` and ``webp`` srcsets (None for pictures
+            uploaded before variants existed).
+        """
+        sources = {'src': url_for('static', filename='profile_pics/' + image_file),
+                   'jpeg': None, 'webp': None}
+        if _has_variants(self.directory, image_file, self.sizes[0]):
+            stem, _ = os.path.splitext(image_file)
+            for key, ext in (('jpeg', 'jpg'), ('webp', 'webp')):
+                sources[key] = ', '.join(
+                    url_for('static', filename=f'profile_pics/{stem}-{size}.{ext}') + f' {size}w'
+                    for size in self.sizes)
+        return sources
+
+    def stats(self):
+        """Returns processing counters."""
+        return {
+            'workers': self.workers,
+            'processed': self.processed,
+            'deduplicated': self.deduplicated,
+            'failed': self.failed,
+            'pending': len(self._latest),
+        }
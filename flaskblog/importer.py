@@ -0,0 +1,187 @@
+import hashlib
+import json
+import time
+from datetime import datetime, timezone
+from sqlalchemy import bindparam, case, select
+from flaskblog import db
+from flaskblog.models import Post, User, summarize, utcnow
+
+# Characters between records: JSON array brackets, commas and whitespace,
+# so the same reader handles a JSON array and JSON Lines.
+SEPARATORS = '[],\r\n\t '
+
+
+def iter_records(fp, chunk_size=1 << 16):
+    """Streams the objects of a JSON array or a JSON Lines file.
+
+    Only one read buffer is held in memory, however large the file.
+
+    Args:
+        fp (file): Text file opened for reading.
+        chunk_size (int): Characters read at a time.
+
+    Yields:
+        dict: Each top-level record in order.
+
+    Raises:
+        ValueError: If the file ends in the middle of a record.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    eof = False
+    while True:
+        buffer = buffer.lstrip(SEPARATORS)
+        if not buffer:
+            if eof:
+                return
+            chunk = fp.read(chunk_size)
+            eof = not chunk
+            buffer = chunk
+            continue
+        try:
+            record, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = fp.read(chunk_size)
+            eof = not chunk
+            buffer += chunk
+            continue
+        buffer = buffer[end:]
+        yield record
+
+
+def title_key(title):
+    """Returns a compact hash of a post title for duplicate detection."""
+    return hashlib.blake2b(title.encode('utf-8'), digest_size=8).digest()
+
+
+def _parse_date(value, default):
+    if not value:
+        return default
+    if not isinstance(value, str):
+        raise ValueError(f"Invalid date: {value!r}")
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc)
+    return parsed
+
+
+class PostImporter:
+    """Bulk-loads posts from a stream of records.
+
+    Existing titles are preloaded once as 8-byte hashes, so duplicates cost
+    a set lookup instead of a query. Rows are inserted with one
+    ``executemany`` per batch, each batch in its own transaction together
+    with the authors' ``post_count``/``last_posted_at`` updates, so an
+    interrupted import keeps every completed batch and consistent counters.
+
+    Args:
+        batch_size (int): Rows inserted per transaction.
+        default_user_id (int, optional): Author for records without ``user_id``.
+        progress (callable, optional): Called with the importer after each batch.
+
+    Attributes:
+        read (int): Records read from the input.
+        inserted (int): Posts inserted.
+        duplicates (int): Records skipped because the title already exists.
+        invalid (int): Records skipped for not being an object, a missing or
+            malformed field, or an unknown user.
+        authors (set): Ids of users who received posts.
+    """
+
+    def __init__(self, batch_size=5000, default_user_id=None, progress=None):
+        self.batch_size = batch_size
+        self.default_user_id = default_user_id
+        self.progress = progress
+        self.read = 0
+        self.inserted = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.authors = set()
+        self.started = None
+
+    @property
+    def rate(self):
+        """float: Records processed per second so far."""
+        elapsed = time.perf_counter() - self.started if self.started else 0
+        return self.read / elapsed if elapsed else 0.0
+
+    def _preload(self, conn):
+        titles = conn.execute(select(Post.title).execution_options(yield_per=10000))
+        self._seen = {title_key(title) for title, in titles}
+        self._user_ids = set(conn.execute(select(User.id)).scalars())
+
+    def _row(self, record, now):
+        if not isinstance(record, dict):
+            self.invalid += 1
+            return None
+        title, content = record.get('title'), record.get('content')
+        user_id = record.get('user_id', self.default_user_id)
+        try:
+            date_posted = _parse_date(record.get('date_posted'), now)
+        except ValueError:
+            date_posted = None
+        if (not title or not isinstance(title, str) or not isinstance(content, str)
+                or not isinstance(user_id, int) or user_id not in self._user_ids
+                or date_posted is None):
+            self.invalid += 1
+            return None
+        key = title_key(title)
+        if key in self._seen:
+            self.duplicates += 1
+            return None
+        self._seen.add(key)
+        excerpt, word_count = summarize(content)
+        return {'title': title, 'content': content, 'excerpt': excerpt, 'word_count': word_count,
+                'user_id': user_id, 'date_posted': date_posted, 'updated_at': date_posted}
+
+    @staticmethod
+    def _counter_updates(rows):
+        totals = {}
+        for row in rows:
+            count, newest = totals.get(row['user_id'], (0, None))
+            # Dates are UTC, some naive and some aware; compare them naive.
+            date_posted = row['date_posted'].replace(tzinfo=None)
+            if newest is None or date_posted > newest:
+                newest = date_posted
+            totals[row['user_id']] = (count + 1, newest)
+        return [{'author_id': user_id, 'added': count, 'newest': newest}
+                for user_id, (count, newest) in totals.items()]
+
+    def _flush(self, rows):
+        if rows:
+            user = User.__table__
+            newest = bindparam('newest', type_=user.c.last_posted_at.type)
+            with db.engine.begin() as conn:
+                conn.execute(Post.__table__.insert(), rows)
+                conn.execute(user.update().where(user.c.id == bindparam('author_id')).values(
+                    post_count=user.c.post_count + bindparam('added'),
+                    last_posted_at=case(
+                        (user.c.last_posted_at.is_(None), newest),
+                        (user.c.last_posted_at < newest, newest),
+                        else_=user.c.last_posted_at),
+                    updated_at=user.c.updated_at), self._counter_updates(rows))
+            self.inserted += len(rows)
+            self.authors.update(row['user_id'] for row in rows)
+        if self.progress is not None:
+            self.progress(self)
+
+    def run(self, records):
+        """Imports ``records`` and returns the importer with its counters."""
+        self.started = time.perf_counter()
+        with db.engine.connect() as conn:
+            self._preload(conn)
+        # Undated records share one timestamp; ids keep them in file order.
+        now = utcnow()
+        rows = []
+        for record in records:
+            self.read += 1
+            row = self._row(record, now)
+            if row is not None:
+                rows.append(row)
+            if len(rows) >= self.batch_size:
+                self._flush(rows)
+                rows = []
+        self._flush(rows)
+        return self
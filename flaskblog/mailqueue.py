@@ -0,0 +1,228 @@
+import json
+import os
+import random
+import sqlite3
+import time
+from flask import current_app
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS mail_job (
+    id INTEGER PRIMARY KEY,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    lease_until REAL,
+    last_error TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_mail_job_due ON mail_job (status, next_attempt_at);
+"""
+
+MESSAGE_FIELDS = ('subject', 'sender', 'recipients', 'body', 'html', 'cc', 'bcc', 'reply_to')
+
+
+class LazyMail:
+    """Flask-Mail extension that imports Flask-Mail on first use.
+
+    Only the mail worker talks SMTP, so web workers and other commands
+    never import Flask-Mail, and with it ``smtplib`` and the ``email``
+    package. The first attribute access sets Flask-Mail up for the current
+    app and forwards to it, e.g. ``mail.connect()`` or ``mail.send(msg)``.
+    """
+
+    def __init__(self, app=None):
+        self._mail = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Registers the app; Flask-Mail reads its config on first use."""
+        app.extensions['lazy_mail'] = self
+
+    def _get(self):
+        from flask_mail import Mail
+
+        if self._mail is None:
+            self._mail = Mail()
+        app = current_app._get_current_object()
+        if 'mail' not in app.extensions:
+            self._mail.init_app(app)
+        return self._mail
+
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+
+
+class MailQueue:
+    """Durable outbox that sends mail from a worker instead of the request.
+
+    Jobs live in a local SQLite file, separate from the app database, so
+    ``enqueue`` is a single fsynced insert and survives restarts. A worker
+    (``flask mail-worker``) claims due jobs in batches, sends each batch
+    over one SMTP connection, and retries failures with exponential backoff
+    until ``MAIL_QUEUE_MAX_ATTEMPTS``, after which the job is marked dead.
+
+    Claimed jobs hold a lease; if a worker dies mid-batch they become due
+    again once the lease expires.
+    """
+
+    def __init__(self, app=None):
+        self.path = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Reads the queue configuration from the app."""
+        self.path = app.config.get('MAIL_QUEUE_PATH') or os.path.join(app.instance_path, 'mail_queue.db')
+        self.batch_size = app.config.get('MAIL_QUEUE_BATCH_SIZE', 50)
+        self.max_attempts = app.config.get('MAIL_QUEUE_MAX_ATTEMPTS', 5)
+        self.retry_delay = app.config.get('MAIL_QUEUE_RETRY_DELAY', 30)
+        self.lease = app.config.get('MAIL_QUEUE_LEASE', 300)
+        self._ready = False
+        app.extensions['mail_queue'] = self
+
+    def _connect(self):
+        if not self._ready:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        if not self._ready:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+            self._ready = True
+        return conn
+
+    def enqueue(self, message):
+        """Stores a Flask-Mail message for delivery by the worker.
+
+        Args:
+            message (Message): The message to send.
+
+        Returns:
+            int: The job id.
+        """
+        payload = json.dumps({field: getattr(message, field) for field in MESSAGE_FIELDS})
+        now = time.time()
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "INSERT INTO mail_job (payload, next_attempt_at, created_at) VALUES (?, ?, ?)",
+                (payload, now, now))
+            return cursor.lastrowid
+        finally:
+            conn.close()
+
+    def claim(self, limit):
+        """Leases up to ``limit`` due jobs to the calling worker.
+
+        Returns:
+            list: ``(job_id, attempts, payload)`` tuples.
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            jobs = conn.execute(
+                "SELECT id, attempts, payload FROM mail_job "
+                "WHERE (status = 'queued' AND next_attempt_at <= ?) "
+                "OR (status = 'sending' AND lease_until <= ?) "
+                "ORDER BY id LIMIT ?", (now, now, limit)).fetchall()
+            conn.executemany(
+                "UPDATE mail_job SET status = 'sending', lease_until = ? WHERE id = ?",
+                [(now + self.lease, job_id) for job_id, _, _ in jobs])
+            conn.execute('COMMIT')
+            return [(job_id, attempts, json.loads(payload)) for job_id, attempts, payload in jobs]
+        except Exception:
+            # BEGIN itself may have failed (e.g. "database is locked"); a
+            # ROLLBACK then would raise and hide that error.
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def _finish(self, sent, failed):
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany("DELETE FROM mail_job WHERE id = ?", [(job_id,) for job_id in sent])
+            for job_id, attempts, error in failed:
+                attempts += 1
+                if attempts >= self.max_attempts:
+                    conn.execute(
+                        "UPDATE mail_job SET status = 'dead', attempts = ?, last_error = ? WHERE id = ?",
+                        (attempts, error, job_id))
+                else:
+                    delay = self.retry_delay * 2 ** (attempts - 1) * random.uniform(0.8, 1.2)
+                    conn.execute(
+                        "UPDATE mail_job SET status = 'queued', attempts = ?, next_attempt_at = ?, "
+                        "last_error = ?, lease_until = NULL WHERE id = ?",
+                        (attempts, now + delay, error, job_id))
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+
+    def process_batch(self, mail):
+        """Sends one batch of due jobs over a single SMTP connection.
+
+        Must run inside an app context, since Flask-Mail reads its settings
+        from the app config.
+
+        Args:
+            mail (Mail): The Flask-Mail extension.
+
+        Returns:
+            tuple: ``(sent, failed)`` counts.
+        """
+        from flask_mail import Message
+
+        jobs = self.claim(self.batch_size)
+        if not jobs:
+            return 0, 0
+        sent, failed = [], []
+        try:
+            with mail.connect() as connection:
+                for job_id, attempts, payload in jobs:
+                    try:
+                        connection.send(Message(**payload))
+                    except Exception as e:
+                        failed.append((job_id, attempts, repr(e)))
+                    else:
+                        sent.append(job_id)
+        except Exception as e:
+            # Connecting (or closing) failed; retry whatever was not sent.
+            done = set(sent) | {job_id for job_id, _, _ in failed}
+            failed += [(job_id, attempts, repr(e)) for job_id, attempts, _ in jobs if job_id not in done]
+            current_app.logger.warning("Mail batch failed: %r", e)
+        self._finish(sent, failed)
+        return len(sent), len(failed)
+
+    def run_worker(self, mail, interval=1.0, once=False):
+        """Processes batches until interrupted, sleeping when the queue is idle.
+
+        Args:
+            mail (Mail): The Flask-Mail extension.
+            interval (float): Seconds to sleep when no job is due.
+            once (bool): Stop as soon as no job is due.
+
+        Returns:
+            tuple: Total ``(sent, failed)`` counts.
+        """
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = self.process_batch(mail)
+            total_sent += sent
+            total_failed += failed
+            if not sent and not failed:
+                if once:
+                    return total_sent, total_failed
+                time.sleep(interval)
+
+    def stats(self):
+        """Returns the number of jobs per status."""
+        conn = self._connect()
+        try:
+            return dict(conn.execute("SELECT status, count(*) FROM mail_job GROUP BY status"))
+        finally:
+            conn.close()
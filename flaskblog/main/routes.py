@@ -1,23 +1,52 @@
-from flask import render_template, request, Blueprint
+import hmac
+from flask import render_template, request, make_response, Blueprint, abort, current_app
+from sqlalchemy.orm import defer, joinedload
+from flaskblog import home_timeline, metrics, page_cache
+from flaskblog.cache import add_cache_tags
+from flaskblog.conditional import feed_etag, not_modified, with_validators
+from flaskblog.metrics import CONTENT_TYPE
 from flaskblog.models import Post
+from flaskblog.pagination import paginate_posts
+from flaskblog.search import search_posts
 
 main = Blueprint('main', __name__)
 
 @main.route("/")
 @main.route("/home")
+@page_cache.cached
 def home():
     """Render the home page with paginated blog posts.
     The posts are ordered by date in descending order, showing 5 posts per page.
 
     Query Params:
-        page (int): Page number for pagination. Defaults to 1.
+        before (str): Cursor token; show posts older than it (cursor mode).
+        after (str): Cursor token; show posts newer than it (cursor mode).
+        page (int): Page number when FEED_PAGINATION is "numbered". Defaults to 1.
 
     Returns:
         Response: Rendered template with paginated posts.
+
+    Notes:
+        In cursor mode, pages within the materialized home timeline are
+        served from it without a query. Otherwise authors are joined into
+        the page query so rendering issues no per-post user lookups, and the
+        content column is not loaded: cards show the precomputed excerpt. Anonymous views are served from the page cache.
+        A matching ``If-None-Match`` gets a 304 without rendering.
     """
-    page = request.args.get('page', 1, type=int)
-    posts = Post.query.order_by(Post.date_posted.desc()).paginate(page=page, per_page=5)
-    return render_template('home.html', posts=posts)
+    add_cache_tags('feed')
+    posts = None
+    if current_app.config.get('FEED_PAGINATION') != 'numbered':
+        posts = home_timeline.page(5, before=request.args.get('before'),
+                                   after=request.args.get('after'))
+    if posts is None:
+        posts = paginate_posts(Post.query.options(joinedload(Post.author), defer(Post.content)))
+    add_cache_tags(*(f'post:{post.id}' for post in posts.items),
+                   *(f'author:{post.user_id}' for post in posts.items))
+    etag = feed_etag(posts)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    return with_validators(make_response(render_template('home.html', posts=posts)), etag)
 
 
 @main.route('/about')
@@ -26,4 +55,40 @@ def about():
     Returns:
         Response: Rendered template for the about page.
     """
-    return render_template("about.html", title='About')
\ No newline at end of file
+    return render_template("about.html", title='About')
+
+
+@main.route('/search')
+def search():
+    """Render ranked full-text search results over post titles and content.
+
+    Query Params:
+        q (str): Search words; posts must contain all of them.
+        page (int): Page number of the results. Defaults to 1.
+
+    Returns:
+        Response: Rendered template with the matching posts.
+    """
+    query = request.args.get('q', '').strip()
+    page = request.args.get('page', 1, type=int)
+    results = search_posts(query, page=page, per_page=5)
+    return render_template('search.html', title='Search', query=query, results=results)
+
+
+@main.route("/metrics")
+def metrics_endpoint():
+    """Expose request, database and cache metrics for Prometheus.
+
+    Returns:
+        Response: Text exposition format. 404 when METRICS_ENABLED is off or
+        no METRICS_TOKEN is configured, 401 when the bearer token does not match.
+    """
+    token = current_app.config.get('METRICS_TOKEN')
+    if not current_app.config.get('METRICS_ENABLED', True) or not token:
+        abort(404)
+    supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    if not hmac.compare_digest(supplied.encode(), token.encode()):
+        abort(401)
+    response = make_response(metrics.render())
+    response.content_type = CONTENT_TYPE
+    return response
@@ -0,0 +1,237 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from flask import current_app, request, template_rendered, before_render_template
+from sqlalchemy import event
+
+# Extensions whose numeric ``stats()`` are exported as gauges.
+STATS_EXTENSIONS = ('pool_monitor', 'replica_router', 'page_cache', 'home_timeline',
+                    'view_counter', 'identity_cache', 'password_hasher', 'rate_limiter', 'images',
+                    'static_assets', 'mail_queue')
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Per-request accumulator: [started, query count, query seconds, template
+# seconds, template started]. A context variable is much cheaper to reach
+# from engine events than flask.g.
+_request_state = ContextVar('flaskblog_metrics_request', default=None)
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _format_labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    """Monotonic counter with labels, in Prometheus exposition format."""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_values=(), amount=1):
+        """Adds ``amount`` to the series identified by ``label_values``."""
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def collect(self):
+        """Yields exposition lines for every series."""
+        with self._lock:
+            values = list(self._values.items())
+        for label_values, value in sorted(values):
+            yield f'{self.name}{_format_labels(self.labels, label_values)} {value}'
+
+
+class Histogram:
+    """Histogram with fixed buckets and labels.
+
+    Observations cost one ``bisect`` and a few additions under a lock;
+    buckets are made cumulative only when collected.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, buckets, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        """Records ``value`` in the series identified by ``label_values``."""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(label_values)
+            if series is None:
+                # One slot per bucket, then +Inf, sum and count.
+                series = self._values[label_values] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def collect(self):
+        """Yields exposition lines for every series."""
+        with self._lock:
+            values = [(key, list(series)) for key, series in self._values.items()]
+        for label_values, series in sorted(values):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), series):
+                cumulative += count
+                labels = _format_labels(self.labels, label_values, f'le="{bound}"')
+                yield f'{self.name}_bucket{labels} {cumulative}'
+            labels = _format_labels(self.labels, label_values)
+            yield f'{self.name}_sum{labels} {series[-2]}'
+            yield f'{self.name}_count{labels} {series[-1]}'
+
+
+class Metrics:
+    """Per-request performance instrumentation with a Prometheus endpoint.
+
+    Records, per endpoint, request latency, response size, SQL query count
+    and time (from engine cursor events) and template render time (from
+    Flask's template signals). ``render`` produces the text exposition
+    format served on ``/metrics``, including numeric ``stats()`` of the
+    app's extensions as gauges. With ``app.debug`` every response also gets
+    a ``Server-Timing`` header for the browser's network panel.
+
+    Metrics live in process memory, so each worker process reports its own.
+
+    Configuration:
+        METRICS_ENABLED (bool): Record metrics and serve /metrics (default on).
+        METRICS_TOKEN (str): /metrics requires ``Authorization: Bearer <token>``;
+            without a token it is not served at all.
+    """
+
+    def __init__(self, app=None, db=None):
+        self.requests = Counter(
+            'flaskblog_http_requests_total', 'HTTP requests handled.',
+            ('endpoint', 'method', 'status'))
+        self.latency = Histogram(
+            'flaskblog_http_request_duration_seconds', 'Time spent handling a request.',
+            LATENCY_BUCKETS, ('endpoint', 'method'))
+        self.response_size = Histogram(
+            'flaskblog_http_response_size_bytes', 'Size of buffered response bodies.',
+            SIZE_BUCKETS, ('endpoint',))
+        self.queries = Histogram(
+            'flaskblog_db_queries_per_request', 'SQL statements executed per request.',
+            QUERY_COUNT_BUCKETS, ('endpoint',))
+        self.query_time = Counter(
+            'flaskblog_db_query_seconds_total', 'Time spent executing SQL, per endpoint.',
+            ('endpoint',))
+        self.template_time = Histogram(
+            'flaskblog_template_render_seconds', 'Time spent rendering templates.',
+            LATENCY_BUCKETS, ('template',))
+        self.collectors = [self.requests, self.latency, self.response_size,
+                           self.queries, self.query_time, self.template_time]
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        """Installs the request hooks, SQL and template listeners."""
+        app.extensions['metrics'] = self
+        if not app.config.get('METRICS_ENABLED', True):
+            return
+
+        def finish_request(response):
+            return self._finish_request(app, response)
+
+        app.before_request(self._start_request)
+        app.after_request(finish_request)
+        before_render_template.connect(self._start_template, app)
+        template_rendered.connect(self._finish_template, app)
+        with app.app_context():
+            engines = list(db.engines.values())
+        for engine in engines:
+            event.listen(engine, 'before_cursor_execute', self._start_query)
+            event.listen(engine, 'after_cursor_execute', self._finish_query)
+
+    @staticmethod
+    def _start_request():
+        _request_state.set([time.perf_counter(), 0, 0.0, 0.0, None])
+
+    def _finish_request(self, app, response):
+        state = _request_state.get()
+        if state is None:
+            return response
+        _request_state.set(None)
+        duration = time.perf_counter() - state[0]
+        req = request._get_current_object()
+        endpoint = req.endpoint or 'unmatched'
+        self.requests.inc((endpoint, req.method, response.status_code))
+        self.latency.observe((endpoint, req.method), duration)
+        self.queries.observe((endpoint,), state[1])
+        if state[2]:
+            self.query_time.inc((endpoint,), state[2])
+        if isinstance(response.response, list):
+            self.response_size.observe((endpoint,), sum(map(len, response.response)))
+        if app.debug:
+            response.headers['Server-Timing'] = (
+                f'app;dur={duration * 1000:.2f}, '
+                f'db;dur={state[2] * 1000:.2f};desc="{state[1]} queries", '
+                f'tpl;dur={state[3] * 1000:.2f}')
+        return response
+
+    @staticmethod
+    def _start_template(sender, template, context, **extra):
+        state = _request_state.get()
+        if state is not None:
+            state[4] = time.perf_counter()
+
+    def _finish_template(self, sender, template, context, **extra):
+        state = _request_state.get()
+        if state is None or state[4] is None:
+            return
+        duration = time.perf_counter() - state[4]
+        state[3] += duration
+        state[4] = None
+        self.template_time.observe((template.name,), duration)
+
+    @staticmethod
+    def _start_query(conn, cursor, statement, parameters, context, executemany):
+        state = _request_state.get()
+        if state is not None:
+            conn.info['metrics_query_started'] = time.perf_counter()
+
+    @staticmethod
+    def _finish_query(conn, cursor, statement, parameters, context, executemany):
+        state = _request_state.get()
+        started = conn.info.pop('metrics_query_started', None)
+        if state is not None and started is not None:
+            state[1] += 1
+            state[2] += time.perf_counter() - started
+
+    def render(self):
+        """Returns every metric in Prometheus text exposition format."""
+        lines = []
+        for collector in self.collectors:
+            lines.append(f'# HELP {collector.name} {collector.documentation}')
+            lines.append(f'# TYPE {collector.name} {collector.kind}')
+            lines.extend(collector.collect())
+        for name in STATS_EXTENSIONS:
+            extension = current_app.extensions.get(name)
+            if extension is None:
+                continue
+            for key, value in sorted(extension.stats().items()):
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    metric = f'flaskblog_{name}_{key}'
+                    lines.append(f'# TYPE {metric} gauge')
+                    lines.append(f'{metric} {value}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,226 @@
+from datetime import datetime, timezone
+import time
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, bindparam, func, inspect, select
+from flaskblog import db
+from flaskblog.models import Post, User, summarize
+from flaskblog.search import create_fts5_index
+
+# Applied versions live in their own metadata so db.create_all() never touches them.
+schema_metadata = MetaData()
+schema_version = Table(
+    'schema_version', schema_metadata,
+    Column('version', Integer, primary_key=True),
+    Column('description', String(200), nullable=False),
+    Column('applied_at', DateTime, nullable=False),
+)
+
+MIGRATIONS = []
+
+
+def migration(version, description):
+    """Registers an additive schema migration.
+
+    Migrations run in version order, once per database, each inside its own
+    transaction. They must be idempotent because a fresh database already
+    gets the current schema from ``db.create_all()`` before they run.
+
+    Args:
+        version (int): Unique, increasing version number.
+        description (str): Short summary recorded in ``schema_version``.
+    """
+    def decorator(func):
+        MIGRATIONS.append((version, description, func))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return func
+    return decorator
+
+
+def add_column(conn, table, column):
+    """Adds ``column`` to ``table`` unless it already exists.
+
+    Args:
+        conn (Connection): Connection inside the migration transaction.
+        table (Table): Table to alter.
+        column (Column): Column definition, usually copied from the model.
+    """
+    existing = {c['name'] for c in inspect(conn).get_columns(table.name)}
+    if column.name in existing:
+        return
+    column_type = column.type.compile(dialect=conn.dialect)
+    ddl = f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'
+    if column.server_default is not None:
+        ddl += f' DEFAULT {column.server_default.arg}'
+    conn.exec_driver_sql(ddl)
+
+
+def create_index(conn, table, name):
+    """Creates the index ``name`` declared on ``table`` unless it exists.
+
+    Args:
+        conn (Connection): Connection inside the migration transaction.
+        table (Table): Table declaring the index.
+        name (str): Index name as declared on the model.
+    """
+    index = next(i for i in table.indexes if i.name == name)
+    index.create(conn, checkfirst=True)
+
+
+def upgrade():
+    """Brings the database schema up to date without dropping anything.
+
+    Creates missing tables, then applies every registered migration that is
+    not yet recorded in ``schema_version``. Must run inside an app context.
+
+    Returns:
+        list: ``(version, description)`` for each migration applied.
+    """
+    engine = db.engine
+    schema_metadata.create_all(engine)
+    db.create_all()
+    applied = []
+    with engine.connect() as conn:
+        done = set(conn.scalars(select(schema_version.c.version)))
+    for version, description, func in MIGRATIONS:
+        if version in done:
+            continue
+        with engine.begin() as conn:
+            func(conn)
+            conn.execute(schema_version.insert().values(
+                version=version, description=description,
+                applied_at=datetime.now(timezone.utc)))
+        applied.append((version, description))
+    return applied
+
+
+@migration(1, 'Index post.date_posted and post(user_id, date_posted)')
+def index_post_feeds(conn):
+    create_index(conn, Post.__table__, 'ix_post_date_posted')
+    create_index(conn, Post.__table__, 'ix_post_user_id_date_posted')
+
+
+@migration(2, 'Add SQLite FTS5 full-text index over post title and content')
+def add_post_fts(conn):
+    create_fts5_index(conn)
+
+
+@migration(3, 'Add updated_at to post and user')
+def add_updated_at(conn):
+    add_column(conn, Post.__table__, Post.__table__.c.updated_at)
+    add_column(conn, User.__table__, User.__table__.c.updated_at)
+    conn.execute(Post.__table__.update().where(Post.updated_at.is_(None))
+                 .values(updated_at=Post.date_posted))
+
+
+@migration(4, 'Add excerpt and word_count to post')
+def add_post_excerpt(conn):
+    add_column(conn, Post.__table__, Post.__table__.c.excerpt)
+    add_column(conn, Post.__table__, Post.__table__.c.word_count)
+
+
+@migration(5, 'Add post_count and last_posted_at to user')
+def add_user_post_counters(conn):
+    add_column(conn, User.__table__, User.__table__.c.post_count)
+    add_column(conn, User.__table__, User.__table__.c.last_posted_at)
+    _reconcile_post_counts(conn)
+
+
+@migration(6, 'Add views to post')
+def add_post_views(conn):
+    add_column(conn, Post.__table__, Post.__table__.c.views)
+
+
+@migration(7, 'Fill post excerpt and word_count')
+def fill_post_excerpts(conn):
+    # Until filled, feed pages fall back to each post's deferred content.
+    last_id = 0
+    while True:
+        filled = _backfill_excerpt_batch(conn, last_id, 1000, recompute=False)
+        if not filled:
+            return
+        last_id = filled[-1]
+
+
+def _backfill_excerpt_batch(conn, last_id, batch_size, recompute):
+    post = Post.__table__
+    query = (select(post.c.id, post.c.content).where(post.c.id > last_id)
+             .order_by(post.c.id).limit(batch_size))
+    if not recompute:
+        query = query.where(post.c.excerpt.is_(None))
+    rows = conn.execute(query).all()
+    if not rows:
+        return []
+    params = []
+    for post_id, content in rows:
+        excerpt, word_count = summarize(content)
+        params.append({'post_id': post_id, 'new_excerpt': excerpt, 'new_word_count': word_count})
+    conn.execute(post.update().where(post.c.id == bindparam('post_id')).values(
+        excerpt=bindparam('new_excerpt'), word_count=bindparam('new_word_count'),
+        updated_at=post.c.updated_at), params)
+    return [post_id for post_id, _ in rows]
+
+
+def backfill_excerpts(batch_size=1000, recompute=False, progress=None):
+    """Fills ``post.excerpt`` and ``post.word_count`` for existing posts.
+
+    ``upgrade()`` already fills missing excerpts (migration 7); this is for
+    recomputing them after ``summarize`` changes, or for rows loaded
+    outside the app. Walks the table in primary-key order, reading only
+    ``id`` and ``content`` and writing each batch with one ``executemany``
+    in its own transaction, so it can be interrupted and resumed.
+    ``updated_at`` is left untouched. Must run inside an app context.
+
+    Args:
+        batch_size (int): Posts updated per transaction.
+        recompute (bool): Also recompute posts that already have an excerpt.
+        progress (callable, optional): Called with ``(updated, rows_per_second)``
+            after each batch.
+
+    Returns:
+        int: Number of posts updated.
+    """
+    started = time.perf_counter()
+    updated, last_id = 0, 0
+    while True:
+        with db.engine.begin() as conn:
+            filled = _backfill_excerpt_batch(conn, last_id, batch_size, recompute)
+        if not filled:
+            return updated
+        updated += len(filled)
+        last_id = filled[-1]
+        if progress is not None:
+            progress(updated, updated / (time.perf_counter() - started))
+
+
+def _reconcile_post_counts(conn):
+    user, post = User.__table__, Post.__table__
+    # One pass over ix_post_user_id_date_posted, which covers both aggregates.
+    actual = {user_id: (count, newest) for user_id, count, newest in conn.execute(
+        select(post.c.user_id, func.count(), func.max(post.c.date_posted))
+        .group_by(post.c.user_id))}
+    params = []
+    for user_id, count, newest in conn.execute(
+            select(user.c.id, user.c.post_count, user.c.last_posted_at)):
+        expected = actual.get(user_id, (0, None))
+        if (count, newest) != expected:
+            params.append({'user_id': user_id, 'new_count': expected[0],
+                           'new_last_posted_at': expected[1]})
+    if params:
+        conn.execute(user.update().where(user.c.id == bindparam('user_id')).values(
+            post_count=bindparam('new_count'), last_posted_at=bindparam('new_last_posted_at'),
+            updated_at=user.c.updated_at), params)
+    return [row['user_id'] for row in params]
+
+
+def reconcile_post_counts():
+    """Recomputes every user's ``post_count`` and ``last_posted_at`` from ``post``.
+
+    The counters are kept current as posts are written, so this only
+    repairs drift, e.g. after rows were changed by hand or by a bulk load
+    that bypassed the ORM. Only users whose counters differ are rewritten,
+    in one transaction. Must run inside an app context.
+
+    Returns:
+        list: Ids of the users whose counters were corrected.
+    """
+    with db.engine.begin() as conn:
+        return _reconcile_post_counts(conn)
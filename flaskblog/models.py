@@ -1,16 +1,52 @@
 from datetime import datetime, timezone
+from sqlalchemy import case, event, func, select
 from itsdangerous import URLSafeTimedSerializer as Serializer
 from flask import current_app
-from flaskblog import db, login_manager
+from flaskblog import db, login_manager, user_cache
 from flask_login import UserMixin
 
 
+# Maximum length of Post.excerpt, shown on feed pages instead of the content.
+EXCERPT_LENGTH = 280
+
+
+def utcnow():
+    """Returns the current time in UTC; used as a column default."""
+    return datetime.now(timezone.utc)
+
+
+def summarize(content, length=EXCERPT_LENGTH):
+    """Computes the feed excerpt and word count of a post body.
+
+    Whitespace is collapsed and the text is cut at a word boundary, with an
+    ellipsis when anything was removed.
+
+    Args:
+        content (str): Full post content.
+        length (int): Maximum excerpt length before the ellipsis.
+
+    Returns:
+        tuple: ``(excerpt, word_count)``.
+    """
+    words = content.split()
+    excerpt = ' '.join(words)
+    if len(excerpt) > length:
+        cut = excerpt[:length]
+        if excerpt[length] != ' ' and ' ' in cut:
+            cut = cut.rsplit(' ', 1)[0]
+        excerpt = cut.rstrip() + '…'
+    return excerpt, len(words)
+
+
 @login_manager.user_loader
 def load_user(user_id):
     """User loader callback for Flask-Login.
  
     This function retrieves the user from the database using the user ID.
     If the user is found, it returns the User object; otherwise, it returns None.
+    Rows are served from the identity cache for USER_CACHE_TTL seconds, so
+    most authenticated requests skip the SELECT; the password hash is never
+    cached.
     
     Args:
         user_id (str): The user ID stored in the session
@@ -18,7 +54,7 @@ def load_user(user_id):
     Returns:
         User or None: The User object if found, None otherwise
     """
-    return User.query.get(int(user_id))
+    return user_cache.get(db.session, User, int(user_id), exclude=('password',))
 
 class User(db.Model, UserMixin):
     """User model for storing user account information.
@@ -29,6 +65,9 @@ class User(db.Model, UserMixin):
         email (str): Unique email address, maximum 120 characters
         password (str): Hashed password, maximum 120 characters
         image_file (str): Profile picture filename, defaults to "default.jpg"
+        updated_at (datetime): Timestamp of the last profile change, None for legacy rows
+        post_count (int): Number of posts by the user, maintained with the posts
+        last_posted_at (datetime): Publication time of the user's newest post, None without posts
         posts (relationship): One-to-many relationship with Post model
         
     Inherits:
@@ -40,20 +79,22 @@ class User(db.Model, UserMixin):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password = db.Column(db.String(120), nullable=False)
     image_file = db.Column(db.String(20), nullable=False, default="default.jpg")
+    updated_at = db.Column(db.DateTime, default=utcnow, onupdate=utcnow)
+    post_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    last_posted_at = db.Column(db.DateTime)
     posts = db.relationship('Post', backref='author', lazy=True)
 
-    def get_reset_token(self, expires_sec=1800):
+    def get_reset_token(self):
         """Generates a password reset token for the user."""
-        s = Serializer(current_app.config['SECRET_KEY'], expires_sec)
-        s.dumps({'user_id': self.id})
-        return s
+        s = Serializer(current_app.config['SECRET_KEY'])
+        return s.dumps({'user_id': self.id})
     
     @staticmethod
-    def verify_reset_token(token):
+    def verify_reset_token(token, expires_sec=1800):
         """Verifies a password reset token and returns the user if valid."""
         s = Serializer(current_app.config['SECRET_KEY'])
         try:
-            user_id = s.loads(token)['user_id']
+            user_id = s.loads(token, max_age=expires_sec)['user_id']
         except:
             return None
         return User.query.get(user_id)
@@ -72,6 +113,11 @@ class Post(db.Model):
         title (str): Post title, maximum 100 characters
         date_posted (datetime): Timestamp when the post was created, defaults to current UTC time
         content (str): Post content, stored as text with no length limit
+        excerpt (str): Start of the content shown on feed pages; None until backfilled
+        word_count (int): Number of words in the content; None until backfilled
+        updated_at (datetime): Timestamp of the last edit; drives HTTP ETag/Last-Modified
+        views (int): Page views, flushed in batches by ``ViewCounter``; lags
+            the live count by up to ``VIEW_FLUSH_INTERVAL`` seconds
         user_id (int): Foreign key referencing the User who created the post
         author (User): Backref relationship to the User model
     
@@ -80,14 +126,63 @@ class Post(db.Model):
         
     Relationships:
         author: Many-to-one relationship with User model (accessed via backref)
+
+    Counters:
+        Inserting or deleting a post through the ORM updates the author's
+        ``post_count`` and ``last_posted_at`` in the same flush, so the
+        counters commit or roll back with the post. Bulk Core inserts must
+        update them themselves (see ``PostImporter``); ``flask
+        reconcile-post-counts`` repairs any drift.
+
+    Indexes:
+        ix_post_date_posted: Serves the home feed ordering.
+        ix_post_user_id_date_posted: Serves author timelines (filter + ordering).
     """
+    __table_args__ = (
+        db.Index('ix_post_user_id_date_posted', 'user_id', 'date_posted'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
-    date_posted = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    date_posted = db.Column(db.DateTime, nullable=False, index=True, default=utcnow)
     content = db.Column(db.Text, nullable=False)
+    excerpt = db.Column(db.String(EXCERPT_LENGTH + 1))
+    word_count = db.Column(db.Integer)
+    updated_at = db.Column(db.DateTime, default=utcnow, onupdate=utcnow)
+    views = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     
     
+    def set_content(self, content):
+        """Sets the content and recomputes ``excerpt`` and ``word_count``."""
+        self.content = content
+        self.excerpt, self.word_count = summarize(content)
+
     def __repr__(self):
         """String representation of the Post object."""
-        return f"Post('{self.title}', '{self.date_posted}')"
\ No newline at end of file
+        return f"Post('{self.title}', '{self.date_posted}')"
+
+
+@event.listens_for(Post, 'after_insert')
+def _count_new_post(mapper, connection, post):
+    user = User.__table__
+    connection.execute(user.update().where(user.c.id == post.user_id).values(
+        post_count=user.c.post_count + 1,
+        last_posted_at=case(
+            (user.c.last_posted_at.is_(None), post.date_posted),
+            (user.c.last_posted_at < post.date_posted, post.date_posted),
+            else_=user.c.last_posted_at),
+        updated_at=user.c.updated_at))
+
+
+@event.listens_for(Post, 'after_delete')
+def _count_deleted_post(mapper, connection, post):
+    user, table = User.__table__, Post.__table__
+    # Runs after the DELETE, so the subquery sees the remaining posts; it is
+    # answered from ix_post_user_id_date_posted.
+    newest = select(func.max(table.c.date_posted)).where(
+        table.c.user_id == post.user_id).scalar_subquery()
+    connection.execute(user.update().where(user.c.id == post.user_id).values(
+        post_count=case((user.c.post_count > 0, user.c.post_count - 1), else_=0),
+        last_posted_at=newest,
+        updated_at=user.c.updated_at))
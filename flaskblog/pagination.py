@@ -0,0 +1,140 @@
+import base64
+from datetime import datetime
+from flask import current_app, request
+from sqlalchemy import or_
+from flaskblog.models import Post
+
+
+def encode_cursor(post):
+    """Encodes a post's position in the feed as an opaque cursor token.
+
+    The token is the URL-safe base64 form of ``date_posted|id``. Clients
+    must treat it as opaque and only echo it back in ``before``/``after``.
+
+    Args:
+        post (Post): The post marking the cursor position.
+
+    Returns:
+        str: URL-safe cursor token.
+    """
+    raw = f"{post.date_posted.isoformat()}|{post.id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """Decodes a cursor token produced by ``encode_cursor``.
+
+    Args:
+        token (str): The cursor token from the query string.
+
+    Returns:
+        tuple or None: ``(date_posted, post_id)`` or None if the token is malformed.
+    """
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        date_str, post_id = base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8').split('|')
+        return datetime.fromisoformat(date_str), int(post_id)
+    except ValueError:
+        return None
+
+
+class KeysetPage:
+    """A single page of posts fetched by keyset pagination.
+
+    Exposes ``items`` like Flask-SQLAlchemy's ``Pagination`` so templates can
+    loop over either, but replaces page numbers with cursor tokens.
+
+    Attributes:
+        items (list): Posts on this page, newest first.
+        per_page (int): Maximum number of posts per page.
+        has_next (bool): Whether older posts exist after this page.
+        has_prev (bool): Whether newer posts exist before this page.
+    """
+
+    def __init__(self, items, per_page, has_next, has_prev):
+        self.items = items
+        self.per_page = per_page
+        self.has_next = has_next
+        self.has_prev = has_prev
+
+    @property
+    def next_cursor(self):
+        """str or None: Token for the page of older posts (``before``)."""
+        if self.has_next and self.items:
+            return encode_cursor(self.items[-1])
+        return None
+
+    @property
+    def prev_cursor(self):
+        """str or None: Token for the page of newer posts (``after``)."""
+        if self.has_prev and self.items:
+            return encode_cursor(self.items[0])
+        return None
+
+
+def keyset_paginate(query, per_page, before=None, after=None):
+    """Paginates a post query on ``(date_posted, id)`` without OFFSET or COUNT.
+
+    Each page is a single indexed range scan of ``per_page + 1`` rows, so the
+    cost is the same for the first page and the ten-thousandth. The bare
+    ``date_posted <=``/``>=`` bound is redundant logically but lets the
+    database seek into ``ix_post_date_posted`` instead of scanning from the top.
+
+    Args:
+        query (Query): Unordered query over ``Post``.
+        per_page (int): Number of posts per page.
+        before (str, optional): Cursor token; return posts older than it.
+        after (str, optional): Cursor token; return posts newer than it.
+
+    Returns:
+        KeysetPage: The requested page, newest post first.
+    """
+    after_key = decode_cursor(after)
+    if after_key:
+        date_posted, post_id = after_key
+        rows = query.filter(Post.date_posted >= date_posted,
+                            or_(Post.date_posted > date_posted, Post.id > post_id))\
+            .order_by(Post.date_posted.asc(), Post.id.asc()).limit(per_page + 1).all()
+        items = rows[:per_page]
+        items.reverse()
+        return KeysetPage(items, per_page, has_next=True, has_prev=len(rows) > per_page)
+
+    before_key = decode_cursor(before)
+    if before_key:
+        date_posted, post_id = before_key
+        query = query.filter(Post.date_posted <= date_posted,
+                             or_(Post.date_posted < date_posted, Post.id < post_id))
+    rows = query.order_by(Post.date_posted.desc(), Post.id.desc()).limit(per_page + 1).all()
+    return KeysetPage(rows[:per_page], per_page, has_next=len(rows) > per_page,
+                      has_prev=before_key is not None)
+
+
+def paginate_posts(query, per_page=5, total=None):
+    """Paginates a post query using the mode set in ``FEED_PAGINATION``.
+
+    ``cursor`` (the default) reads ``before``/``after`` tokens from the query
+    string. ``numbered`` keeps the classic ``?page=N`` pagination with
+    ``iter_pages`` support, at the cost of an OFFSET scan and, unless
+    ``total`` is given, a COUNT.
+
+    Args:
+        query (Query): Unordered query over ``Post``.
+        per_page (int): Number of posts per page.
+        total (int, optional): Known number of matching posts, e.g. a user's
+            ``post_count``; skips the COUNT in numbered mode.
+
+    Returns:
+        KeysetPage or Pagination: The page of posts to render.
+    """
+    if current_app.config.get('FEED_PAGINATION') == 'numbered':
+        page = request.args.get('page', 1, type=int)
+        pagination = query.order_by(Post.date_posted.desc()).paginate(
+            page=page, per_page=per_page, count=total is None)
+        if total is not None:
+            pagination.total = total
+        return pagination
+    return keyset_paginate(query, per_page,
+                           before=request.args.get('before'),
+                           after=request.args.get('after'))
@@ -1,7 +1,10 @@
-from flask import render_template, request, flash, redirect, url_for, abort, Blueprint
+from flask import render_template, request, flash, redirect, url_for, abort, make_response, Blueprint
 from flask_login import current_user, login_required
-from flaskblog import db
-from flaskblog.models import Post
+from sqlalchemy.orm import joinedload
+from flaskblog import db, home_timeline, page_cache, user_cache, view_counter
+from flaskblog.cache import add_cache_tags
+from flaskblog.conditional import not_modified, post_etag, with_validators
+from flaskblog.models import Post, User
 from flaskblog.posts.forms import PostForm
 
 posts = Blueprint('posts', __name__)
@@ -13,30 +16,49 @@ def new_post():
 
     GET: Renders the post creation form.
     POST: Validates and submits the form data to create a new post in the database.
+        The author's post counters are updated in the same transaction.
 
     Returns:
         Response: Renders template or redirects to the homepage on success.
     """
     form = PostForm()
     if form.validate_on_submit():
-        post = Post(title=form.title.data, content=form.content.data, author=current_user)
+        post = Post(title=form.title.data, author=current_user)
+        post.set_content(form.content.data)
         db.session.add(post)
         db.session.commit()
+        page_cache.invalidate('feed', f'timeline:{current_user.id}')
+        user_cache.invalidate(User, current_user.id)
+        home_timeline.add(post)
         flash("Your post has been created successfully!", "success")
         return redirect(url_for("main.home"))
     return render_template("create_post.html", title="New Post", form=form, legend="New Post")
 
 @posts.route("/post/<int:post_id>")
+@view_counter.counted
+@page_cache.cached
 def post(post_id):
     """Route to display a specific blog post by ID. 
     
+    Answers ``If-None-Match`` with 304 before any template is rendered; the
+    ETag derives from the post and author versions and the stored view count.
+    Every view, cached or not, is counted by the write-behind ``view_counter``.
+
     Args:
         post_id (int): The ID of the post to display.
     Returns:
-        Response: Renders the post detail template with the post data.
+        Response: Renders the post detail template with the post data,
+        or an empty 304 response if the client's copy is current.
     """
-    post = Post.query.get_or_404(post_id)
-    return render_template("post.html", title=post.title, post=post)
+    add_cache_tags(f'post:{post_id}')
+    post = Post.query.options(joinedload(Post.author)).get_or_404(post_id)
+    add_cache_tags(f'author:{post.user_id}')
+    etag = post_etag(post)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    response = make_response(render_template("post.html", title=post.title, post=post))
+    return with_validators(response, etag)
 
 @posts.route("/post/<int:post_id>/update", methods=['GET', 'POST'])
 @login_required
@@ -58,8 +80,10 @@ def update_post(post_id):
     form = PostForm()
     if form.validate_on_submit():
         post.title = form.title.data
-        post.content = form.content.data
+        post.set_content(form.content.data)
         db.session.commit()
+        page_cache.invalidate(f'post:{post.id}')
+        home_timeline.update(post)
         flash("Your post has been updated successfully!", "success")
         return redirect(url_for("posts.post", post_id=post.id))
     elif request.method == 'GET':
@@ -71,6 +95,9 @@ def update_post(post_id):
 @login_required
 def delete_post(post_id):
     """Delete a blog post.
+
+    The author's post counters are updated in the same transaction.
+
     Args:
         post_id (int): ID of the post to be deleted.
     Returns:
@@ -82,5 +109,8 @@ def delete_post(post_id):
         abort(403)
     db.session.delete(post)
     db.session.commit()
+    page_cache.invalidate('feed', f'timeline:{post.user_id}', f'post:{post_id}')
+    user_cache.invalidate(User, post.user_id)
+    home_timeline.remove(post_id)
     flash("Your post has been deleted successfully!", "success")
     return redirect(url_for("main.home"))
\ No newline at end of file
@@ -0,0 +1,233 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import request
+from werkzeug.exceptions import TooManyRequests
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+def parse_rate(value):
+    """Parses a rate such as "20/minute" into token bucket parameters.
+
+    Args:
+        value (str): "<count>/<second|minute|hour|day>".
+
+    Returns:
+        tuple: ``(capacity, tokens refilled per second)``.
+
+    Raises:
+        ValueError: If the rate is malformed.
+    """
+    count, _, period = value.partition('/')
+    if period not in PERIODS or not count.strip().isdigit() or int(count) < 1:
+        raise ValueError(f'Invalid rate {value!r}; expected e.g. "20/minute"')
+    capacity = int(count)
+    return capacity, capacity / PERIODS[period]
+
+
+class RateLimited(TooManyRequests):
+    """Raised when a client exceeds a rate limit or the server sheds load."""
+
+    description = "Too many attempts. Please wait a moment and try again."
+
+
+class MemoryBuckets:
+    """Token buckets kept in process memory.
+
+    Buckets are evicted least-recently-used once ``max_keys`` is reached,
+    so attacker-chosen keys (e.g. random emails) cannot exhaust memory.
+
+    Args:
+        max_keys (int): Maximum number of buckets kept.
+    """
+
+    def __init__(self, max_keys=100_000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate):
+        """Takes one token from the bucket ``key``.
+
+        Returns:
+            float: 0 if a token was taken, else seconds until one is available.
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class RedisBuckets:
+    """Token buckets shared between worker processes through Redis.
+
+    Each take is one atomic Lua script call. Requires the optional
+    ``redis`` package.
+
+    Args:
+        url (str): Redis connection URL.
+        prefix (str): Prefix added to every key.
+    """
+
+    SCRIPT = """
+    local capacity, rate, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+    local tokens = tonumber(state[1]) or capacity
+    local updated = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(now - updated, 0) * rate)
+    local wait = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+    else
+        wait = (1 - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+    redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+    return tostring(wait)
+    """
+
+    def __init__(self, url, prefix='flaskblog:ratelimit:'):
+        import redis
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(self.SCRIPT)
+        self.prefix = prefix
+
+    def take(self, key, capacity, rate):
+        return float(self._script(keys=[self.prefix + key], args=[capacity, rate, time.time()]))
+
+    def __len__(self):
+        return 0
+
+
+class RateLimiter:
+    """Admission control for the CPU-bound authentication endpoints.
+
+    POSTs to protected views first need one of ``AUTH_MAX_CONCURRENT``
+    slots, which caps how many auth requests a process works on at once;
+    when none is free the request is shed immediately. They then take a
+    token from the client IP's bucket and, if the form names an account,
+    from that account's bucket. Rejections are 429 responses with
+    ``Retry-After``, raised before any database lookup or password hashing.
+
+    The concurrency cap is per worker process, whatever the backend: the
+    deployment as a whole admits up to workers times ``AUTH_MAX_CONCURRENT``
+    auth requests at once. Token buckets are per process with the "memory"
+    backend and shared by every worker with "redis". Buckets are keyed on
+    ``request.remote_addr``, which is the real client address only when
+    ``TRUSTED_PROXIES`` matches the proxies in front of the app.
+
+    Configuration:
+        RATELIMIT_ENABLED (bool): Apply limits (default on).
+        RATELIMIT_BACKEND (str): "memory" (default) or "redis".
+        RATELIMIT_REDIS_URL (str): Redis URL; defaults to CACHE_REDIS_URL.
+        RATELIMIT_AUTH_PER_IP (str): Auth attempts per client IP, e.g. "20/minute".
+        RATELIMIT_AUTH_PER_ACCOUNT (str): Auth attempts per account, e.g. "5/minute".
+        AUTH_MAX_CONCURRENT (int): Auth POSTs handled at once per worker process (0: no cap).
+
+    Attributes:
+        allowed (int): Requests admitted.
+        rejected_ip (int): Requests refused by a per-IP bucket.
+        rejected_account (int): Requests refused by a per-account bucket.
+        shed (int): Requests refused because every concurrency slot was busy.
+        in_flight (int): Admitted requests still running.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.buckets = None
+        self.allowed = 0
+        self.rejected_ip = 0
+        self.rejected_account = 0
+        self.shed = 0
+        self.in_flight = 0
+        self._slots = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Reads the limits and builds the bucket backend."""
+        self.enabled = app.config.get('RATELIMIT_ENABLED', True)
+        self.ip_rate = parse_rate(app.config.get('RATELIMIT_AUTH_PER_IP', '20/minute'))
+        self.account_rate = parse_rate(app.config.get('RATELIMIT_AUTH_PER_ACCOUNT', '5/minute'))
+        self.max_concurrent = app.config.get('AUTH_MAX_CONCURRENT', 8)
+        self._slots = threading.BoundedSemaphore(self.max_concurrent) if self.max_concurrent else None
+        if app.config.get('RATELIMIT_BACKEND', 'memory') == 'redis':
+            self.buckets = RedisBuckets(app.config.get('RATELIMIT_REDIS_URL')
+                                        or app.config['CACHE_REDIS_URL'])
+        else:
+            self.buckets = MemoryBuckets()
+        app.extensions['rate_limiter'] = self
+
+    def _count(self, counter, amount=1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def _take(self, key, rate, counter):
+        wait = self.buckets.take(key, *rate)
+        if wait:
+            self._count(counter)
+            raise RateLimited(retry_after=max(1, math.ceil(wait)))
+
+    def protect(self, account_field=None):
+        """Decorator applying the auth limits to a view's POST requests.
+
+        Args:
+            account_field (str, optional): Form field naming the account
+                (e.g. "email") to also limit attempts per account.
+
+        Raises:
+            RateLimited: If the request is shed or over a limit.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.enabled or request.method != 'POST':
+                    return view(*args, **kwargs)
+                if self._slots is not None and not self._slots.acquire(blocking=False):
+                    self._count('shed')
+                    raise RateLimited("The server is busy. Please try again in a moment.",
+                                      retry_after=1)
+                try:
+                    self._take(f'ip:{request.remote_addr}', self.ip_rate, 'rejected_ip')
+                    account = request.form.get(account_field, '').strip().lower() if account_field else ''
+                    if account:
+                        self._take(f'account:{account}', self.account_rate, 'rejected_account')
+                    self._count('allowed')
+                    self._count('in_flight')
+                    try:
+                        return view(*args, **kwargs)
+                    finally:
+                        self._count('in_flight', -1)
+                finally:
+                    if self._slots is not None:
+                        self._slots.release()
+            return wrapper
+        return decorator
+
+    def stats(self):
+        """Returns admission counters."""
+        return {
+            'allowed': self.allowed,
+            'rejected_ip': self.rejected_ip,
+            'rejected_account': self.rejected_account,
+            'shed': self.shed,
+            'in_flight': self.in_flight,
+            'buckets': len(self.buckets) if self.buckets is not None else 0,
+        }
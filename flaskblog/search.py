@@ -0,0 +1,331 @@
+import heapq
+import math
+import re
+import threading
+from collections import defaultdict
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import defer, joinedload
+from flaskblog import db
+from flaskblog.models import Post
+
+TOKEN_RE = re.compile(r'\w+')
+
+# Title matches count this many times a content match when ranking.
+TITLE_WEIGHT = 3.0
+
+# Dropped from queries that also contain other words; they match nearly
+# every post and would make ranking cost proportional to the whole table.
+STOPWORDS = frozenset("""
+    a an and are as at be but by for from has have how i if in into is it its
+    of on or so that the their this to was we were what when which who will
+    with you your
+""".split())
+
+# External-content FTS5 table kept in sync with `post` by triggers, so bulk
+# inserts and raw SQL updates are indexed too.
+FTS5_SCHEMA = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS post_fts USING fts5(
+        title, content, content='post', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2')""",
+    """CREATE TRIGGER IF NOT EXISTS post_fts_ai AFTER INSERT ON post BEGIN
+        INSERT INTO post_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS post_fts_ad AFTER DELETE ON post BEGIN
+        INSERT INTO post_fts(post_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS post_fts_au AFTER UPDATE OF title, content ON post BEGIN
+        INSERT INTO post_fts(post_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO post_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END""",
+    "INSERT INTO post_fts(post_fts) VALUES ('rebuild')",
+]
+
+
+def tokenize(value):
+    """Splits text into lowercase word tokens.
+
+    Args:
+        value (str): Text to tokenize.
+
+    Returns:
+        list: Lowercase tokens in order of appearance.
+    """
+    return [token.lower() for token in TOKEN_RE.findall(value or '')]
+
+
+def create_fts5_index(conn):
+    """Creates and fills the FTS5 index when the database is SQLite.
+
+    Args:
+        conn (Connection): Connection inside a migration transaction.
+
+    Returns:
+        bool: True if the index exists afterwards, False if FTS5 is unavailable.
+    """
+    if conn.dialect.name != 'sqlite':
+        return False
+    try:
+        for statement in FTS5_SCHEMA:
+            conn.exec_driver_sql(statement)
+    except OperationalError:
+        # SQLite built without FTS5; the in-memory index is used instead.
+        return False
+    return True
+
+
+class SearchResults:
+    """One page of ranked search results.
+
+    Attributes:
+        items (list): Posts on this page, best match first.
+        total (int): Number of ranked matches.
+        page (int): Current page number, starting at 1.
+        per_page (int): Maximum number of posts per page.
+        truncated (bool): Whether more matches exist than were ranked.
+    """
+
+    def __init__(self, items, total, page, per_page, truncated=False):
+        self.items = items
+        self.total = total
+        self.page = page
+        self.per_page = per_page
+        self.truncated = truncated
+
+    @property
+    def has_prev(self):
+        """bool: Whether a previous page exists."""
+        return self.page > 1
+
+    @property
+    def has_next(self):
+        """bool: Whether a next page exists."""
+        return self.page * self.per_page < self.total
+
+
+class FTS5Backend:
+    """Searches the SQLite ``post_fts`` table ranked by BM25."""
+
+    name = 'fts5'
+
+    def search(self, terms, offset, limit, window):
+        """Returns ranked post ids for posts containing all ``terms``.
+
+        Only the ``window`` newest matches are ranked, which bounds the cost
+        of broad queries while keeping narrow ones exact.
+
+        Args:
+            terms (list): Query tokens, already tokenized.
+            offset (int): Number of ranked results to skip.
+            limit (int): Maximum number of ids to return.
+            window (int): Maximum number of matches to rank.
+
+        Returns:
+            tuple: ``(post_ids, matches)`` where ``matches`` is capped at ``window``.
+        """
+        match = ' '.join(f'"{term}"' for term in terms)
+        matches = db.session.execute(
+            text("SELECT count(*) FROM (SELECT 1 FROM post_fts WHERE post_fts MATCH :match "
+                 "ORDER BY rowid DESC LIMIT :window)"),
+            {'match': match, 'window': window}).scalar()
+        ids = db.session.execute(
+            text("SELECT rowid FROM (SELECT rowid, bm25(post_fts, :title_weight, 1.0) AS score "
+                 "FROM post_fts WHERE post_fts MATCH :match ORDER BY rowid DESC LIMIT :window) "
+                 "ORDER BY score LIMIT :limit OFFSET :offset"),
+            {'match': match, 'title_weight': TITLE_WEIGHT, 'window': window,
+             'limit': limit, 'offset': offset},
+        ).scalars().all()
+        return ids, matches
+
+
+class MemoryIndex:
+    """Pure-Python inverted index with BM25 ranking.
+
+    Used when the database has no FTS5 index. The index is built from the
+    database on first search, then kept current from committed session
+    changes. Each worker process holds its own copy and only sees the
+    changes it committed itself, so this backend is for single-process
+    deployments: with several workers, posts written through one stay
+    unsearchable in the others until they restart.
+    """
+
+    name = 'memory'
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._postings = defaultdict(dict)
+        self._doc_terms = {}
+        self._doc_lengths = {}
+        self._total_length = 0.0
+        self.built = False
+
+    def build(self):
+        """Rebuilds the whole index from the ``post`` table."""
+        rows = db.session.execute(
+            select(Post.id, Post.title, Post.content).execution_options(yield_per=1000))
+        with self._lock:
+            self._reset()
+            for post_id, title, content in rows:
+                self._add(post_id, title, content)
+            self.built = True
+
+    def _add(self, post_id, title, content):
+        terms = defaultdict(float)
+        for token in tokenize(title):
+            terms[token] += TITLE_WEIGHT
+        for token in tokenize(content):
+            terms[token] += 1.0
+        for token, weight in terms.items():
+            self._postings[token][post_id] = weight
+        self._doc_terms[post_id] = terms
+        self._doc_lengths[post_id] = sum(terms.values())
+        self._total_length += self._doc_lengths[post_id]
+
+    def _remove(self, post_id):
+        terms = self._doc_terms.pop(post_id, None)
+        if terms is None:
+            return
+        for token in terms:
+            postings = self._postings[token]
+            postings.pop(post_id, None)
+            if not postings:
+                del self._postings[token]
+        self._total_length -= self._doc_lengths.pop(post_id)
+
+    def apply(self, changes):
+        """Applies committed post changes to a built index.
+
+        Args:
+            changes (dict): Maps post id to ``(title, content)``, or to None
+                when the post was deleted.
+        """
+        with self._lock:
+            if not self.built:
+                return
+            for post_id, fields in changes.items():
+                self._remove(post_id)
+                if fields is not None:
+                    self._add(post_id, *fields)
+
+    def search(self, terms, offset, limit, window):
+        """Returns ranked post ids for posts containing all ``terms``.
+
+        Args:
+            terms (list): Query tokens, already tokenized.
+            offset (int): Number of ranked results to skip.
+            limit (int): Maximum number of ids to return.
+            window (int): Maximum number of matches to rank, newest first.
+
+        Returns:
+            tuple: ``(post_ids, matches)`` where ``matches`` is capped at ``window``.
+        """
+        if not self.built:
+            self.build()
+        with self._lock:
+            postings = [self._postings.get(term) for term in set(terms)]
+            if not postings or None in postings:
+                return [], 0
+            postings.sort(key=len)
+            candidates = set(postings[0])
+            for other in postings[1:]:
+                candidates &= other.keys()
+            if len(candidates) > window:
+                candidates = heapq.nlargest(window, candidates)
+            n_docs = len(self._doc_terms)
+            avg_length = self._total_length / n_docs
+            idf = [math.log(1 + (n_docs - len(p) + 0.5) / (len(p) + 0.5)) for p in postings]
+
+            def score(post_id):
+                norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[post_id] / avg_length)
+                return sum(weight * (p[post_id] * (self.k1 + 1)) / (p[post_id] + norm)
+                           for weight, p in zip(idf, postings))
+
+            ranked = heapq.nlargest(offset + limit, candidates, key=score)
+        return ranked[offset:], len(candidates)
+
+
+def get_search_backend():
+    """Returns the search backend for the current app.
+
+    ``SEARCH_BACKEND`` may be ``fts5``, ``memory`` or ``auto`` (the default),
+    which picks FTS5 whenever the ``post_fts`` table exists.
+
+    Returns:
+        FTS5Backend or MemoryIndex: The backend, created once per app.
+
+    Raises:
+        RuntimeError: If ``SEARCH_BACKEND`` is ``fts5`` and the database has
+            no ``post_fts`` table.
+    """
+    backend = current_app.extensions.get('search')
+    if backend is None:
+        choice = current_app.config.get('SEARCH_BACKEND', 'auto')
+        has_fts = choice != 'memory' and inspect(db.engine).has_table('post_fts')
+        if choice == 'fts5' and not has_fts:
+            raise RuntimeError("SEARCH_BACKEND is 'fts5' but the database has no post_fts "
+                               "table; run 'flask upgrade-db' on an SQLite build with FTS5")
+        backend = FTS5Backend() if has_fts else MemoryIndex()
+        current_app.extensions['search'] = backend
+    return backend
+
+
+def search_posts(query, page=1, per_page=5):
+    """Runs a ranked full-text search over post titles and content.
+
+    All query words must match, except stopwords when other words are
+    present. Query syntax is not interpreted, so user input cannot produce
+    FTS5 syntax errors. At most ``SEARCH_CANDIDATE_LIMIT`` of the newest
+    matches are ranked.
+
+    Args:
+        query (str): Raw search string from the user.
+        page (int): Page number, starting at 1.
+        per_page (int): Number of results per page.
+
+    Returns:
+        SearchResults: Posts for the requested page with authors loaded.
+    """
+    page = max(page, 1)
+    window = current_app.config.get('SEARCH_CANDIDATE_LIMIT', 1000)
+    terms = tokenize(query)
+    terms = [term for term in terms if term not in STOPWORDS] or terms
+    if not terms:
+        return SearchResults([], 0, page, per_page)
+    ids, total = get_search_backend().search(terms, (page - 1) * per_page, per_page, window)
+    posts = {post.id: post for post in Post.query.filter(Post.id.in_(ids))
+             .options(joinedload(Post.author), defer(Post.content))} if ids else {}
+    return SearchResults([posts[i] for i in ids if i in posts], total, page, per_page,
+                         truncated=total >= window)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_post_changes(session, flush_context):
+    changes = session.info.setdefault('search_changes', {})
+    for obj in session.new | session.dirty:
+        if isinstance(obj, Post):
+            changes[obj.id] = (obj.title, obj.content)
+    for obj in session.deleted:
+        if isinstance(obj, Post):
+            changes[obj.id] = None
+
+
+@event.listens_for(db.session, 'after_commit')
+def _apply_post_changes(session):
+    changes = session.info.pop('search_changes', None)
+    if changes and has_app_context():
+        backend = current_app.extensions.get('search')
+        if isinstance(backend, MemoryIndex):
+            backend.apply(changes)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_post_changes(session):
+    session.info.pop('search_changes', None)
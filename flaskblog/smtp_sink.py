@@ -0,0 +1,110 @@
+import socketserver
+import threading
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Speaks just enough SMTP for smtplib and Flask-Mail."""
+
+    def reply(self, line):
+        self.wfile.write(line.encode('ascii') + b'\r\n')
+
+    def handle(self):
+        sink = self.server.sink
+        with sink.lock:
+            sink.connections += 1
+        self.reply('220 flaskblog fake SMTP sink ready')
+        mail_from, rcpt_tos = None, []
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            line = raw.decode('utf-8', 'replace').rstrip('\r\n')
+            verb = line.split(' ', 1)[0].upper()
+            if verb == 'EHLO':
+                self.wfile.write(b'250-flaskblog\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME\r\n')
+            elif verb == 'HELO':
+                self.reply('250 flaskblog')
+            elif verb == 'AUTH':
+                self.reply('235 2.7.0 Authentication successful')
+            elif verb == 'MAIL':
+                mail_from, rcpt_tos = line.split(':', 1)[1].strip(), []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                rcpt_tos.append(line.split(':', 1)[1].strip())
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                data = []
+                while True:
+                    chunk = self.rfile.readline()
+                    if chunk in (b'.\r\n', b'.\n', b''):
+                        break
+                    data.append(chunk[1:] if chunk.startswith(b'..') else chunk)
+                message = (mail_from, rcpt_tos, b''.join(data))
+                with sink.lock:
+                    sink.messages.append(message)
+                if sink.on_message is not None:
+                    sink.on_message(*message)
+                self.reply('250 OK: queued')
+            elif verb in ('RSET', 'NOOP'):
+                mail_from, rcpt_tos = None, []
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class FakeSMTPServer:
+    """In-process SMTP server that records messages instead of delivering them.
+
+    Point ``MAIL_SERVER``/``MAIL_PORT`` at it with ``MAIL_USE_TLS`` off to
+    exercise the mail queue end to end in tests or local development.
+
+    Args:
+        host (str): Interface to listen on.
+        port (int): Port to listen on; 0 picks a free one.
+        on_message (callable, optional): Called with ``(mail_from, rcpt_tos,
+            raw_bytes)`` for every message received, on the session's thread.
+
+    Attributes:
+        messages (list): ``(mail_from, rcpt_tos, raw_bytes)`` per message.
+        connections (int): SMTP sessions opened, to check batching.
+
+    Example:
+        >>> with FakeSMTPServer() as sink:
+        ...     app.config.update(MAIL_SERVER=sink.host, MAIL_PORT=sink.port)
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, on_message=None):
+        self.messages = []
+        self.on_message = on_message
+        self.connections = 0
+        self.lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer((host, port), _SMTPHandler)
+        self._server.daemon_threads = True
+        self._server.sink = self
+        self.host, self.port = self._server.server_address
+        self._thread = None
+
+    def start(self):
+        """Serves in a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serves on the calling thread until interrupted."""
+        self._server.serve_forever()
+
+    def stop(self):
+        """Shuts the server down and closes its socket."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,65 @@
+import os
+from jinja2 import FileSystemBytecodeCache
+from sqlalchemy.orm import configure_mappers
+
+
+def init_bytecode_cache(app):
+    """Installs an on-disk Jinja bytecode cache on the app.
+
+    Compiled templates are stored as marshalled code objects keyed by
+    template name and source checksum, so every worker process and every
+    restart reuses them instead of parsing and compiling the source again.
+    An edited template simply gets a new entry. Jinja writes entries
+    atomically, so several processes can share one directory.
+
+    Args:
+        app (Flask): The application.
+
+    Returns:
+        FileSystemBytecodeCache or None: The cache, or None if
+        ``TEMPLATE_CACHE_DIR`` is set to "" to disable it.
+    """
+    directory = app.config.get('TEMPLATE_CACHE_DIR')
+    if directory is None:
+        directory = os.path.join(app.instance_path, 'jinja_cache')
+    if not directory:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    cache = FileSystemBytecodeCache(directory)
+    app.jinja_env.bytecode_cache = cache
+    return cache
+
+
+def compile_templates(app):
+    """Loads every HTML template, compiling the ones not yet cached.
+
+    Fills the bytecode cache, if one is installed, and the environment's
+    in-memory template cache.
+
+    Args:
+        app (Flask): The application.
+
+    Returns:
+        list: Names of the templates loaded.
+    """
+    names = app.jinja_env.list_templates(extensions=('html',))
+    for name in names:
+        app.jinja_env.get_template(name)
+    return names
+
+
+def warm_up(app):
+    """Pays first-request costs at boot: templates, URL matcher and ORM mappers.
+
+    Meant to run in ``create_app`` before a server forks its workers, so
+    they inherit compiled templates instead of each compiling on a user's
+    first request.
+
+    Args:
+        app (Flask): The application.
+    """
+    compile_templates(app)
+    # Werkzeug compiles the rule matcher lazily on the first match.
+    app.url_map.update()
+    # SQLAlchemy resolves relationships and backrefs on the first query.
+    configure_mappers()
@@ -0,0 +1,59 @@
+from contextlib import contextmanager
+from sqlalchemy import event
+from flaskblog import db
+
+
+@contextmanager
+def count_queries(engine=None):
+    """Records every SQL statement issued while the block runs.
+
+    Must be entered inside an application context when ``engine`` is omitted.
+
+    Args:
+        engine (Engine, optional): Engine to watch. Defaults to every engine
+            of ``db``, read replicas included.
+
+    Yields:
+        list: The statements executed so far; filled in as the block runs.
+
+    Example:
+        >>> with app.app_context(), count_queries() as statements:
+        ...     client.get('/')
+        >>> len(statements)
+        1
+    """
+    engines = [engine] if engine is not None else list(db.engines.values())
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    for watched in engines:
+        event.listen(watched, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        for watched in engines:
+            event.remove(watched, 'before_cursor_execute', record)
+
+
+@contextmanager
+def assert_max_queries(limit, engine=None):
+    """Fails if the block issues more than ``limit`` SQL statements.
+
+    Guards list pages against N+1 regressions, e.g. a template touching a
+    lazy relationship once per row.
+
+    Args:
+        limit (int): Maximum number of statements allowed.
+        engine (Engine, optional): Engine to watch. Defaults to every engine.
+
+    Raises:
+        AssertionError: If more than ``limit`` statements were executed.
+    """
+    with count_queries(engine) as statements:
+        yield statements
+    if len(statements) > limit:
+        raise AssertionError(
+            f"Expected at most {limit} SQL statements, got {len(statements)}:\n"
+            + "\n".join(statements))
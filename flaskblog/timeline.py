@@ -0,0 +1,340 @@
+import pickle
+import threading
+import time
+from collections import namedtuple
+from sqlalchemy import case, select
+
+# Stand-ins for Post and its author on feed pages: everything home.html,
+# feed_etag and the cursor tokens read, and nothing else.
+TimelineAuthor = namedtuple('TimelineAuthor', 'id username image_file')
+TimelineEntry = namedtuple('TimelineEntry', 'id title excerpt date_posted updated_at views user_id author')
+
+FIELDS = ('id', 'title', 'excerpt', 'date_posted', 'updated_at', 'views', 'user_id', 'username', 'image_file')
+
+
+def _key(entry):
+    return entry['date_posted'], entry['id']
+
+
+def _summary(post):
+    from flaskblog.models import summarize
+
+    author = post.author
+    return {'id': post.id, 'title': post.title,
+            'excerpt': post.excerpt if post.excerpt is not None else summarize(post.content)[0],
+            'date_posted': post.date_posted, 'updated_at': post.updated_at, 'views': post.views or 0,
+            'user_id': post.user_id, 'username': author.username, 'image_file': author.image_file}
+
+
+def _to_entry(summary):
+    return TimelineEntry(summary['id'], summary['title'], summary['excerpt'],
+                         summary['date_posted'], summary['updated_at'], summary['views'], summary['user_id'],
+                         TimelineAuthor(summary['user_id'], summary['username'], summary['image_file']))
+
+
+class MemoryTimelineStore:
+    """Timeline state kept in process memory.
+
+    Updates replace the state instead of mutating it, so readers never
+    need the lock.
+    """
+
+    def __init__(self):
+        self._state = None
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+
+    def get(self):
+        return self._state
+
+    def lock_rebuild(self):
+        """Claims the right to rebuild without waiting; False if taken."""
+        return self._rebuild_lock.acquire(blocking=False)
+
+    def unlock_rebuild(self):
+        self._rebuild_lock.release()
+
+    def modify(self, change):
+        """Applies ``change(state)``; it returns the new state or None to keep it."""
+        with self._lock:
+            state = change(self._state)
+            if state is not None:
+                self._state = state
+
+
+class RedisTimelineStore:
+    """Timeline state shared between worker processes through Redis.
+
+    The state is one pickled value, changed with optimistic ``WATCH``
+    transactions. Requires the optional ``redis`` package.
+
+    Args:
+        url (str): Redis connection URL.
+        key (str): Key holding the state.
+    """
+
+    def __init__(self, url, key='flaskblog:timeline:home'):
+        import redis
+        self._client = redis.Redis.from_url(url)
+        self._watch_error = redis.WatchError
+        self.key = key
+
+    def get(self):
+        raw = self._client.get(self.key)
+        return pickle.loads(raw) if raw is not None else None
+
+    def lock_rebuild(self, timeout=30):
+        """Claims the right to rebuild for every worker; expires after ``timeout`` seconds."""
+        return bool(self._client.set(f'{self.key}:rebuild', 1, nx=True, ex=timeout))
+
+    def unlock_rebuild(self):
+        self._client.delete(f'{self.key}:rebuild')
+
+    def modify(self, change):
+        with self._client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(self.key)
+                    raw = pipe.get(self.key)
+                    state = change(pickle.loads(raw) if raw is not None else None)
+                    if state is None:
+                        pipe.unwatch()
+                        return
+                    pipe.multi()
+                    pipe.set(self.key, pickle.dumps(state))
+                    pipe.execute()
+                    return
+                except self._watch_error:
+                    continue
+
+
+class HomeTimeline:
+    """Materialized head of the home feed, maintained on write.
+
+    Keeps summaries of the newest ``TIMELINE_SIZE`` posts (id, title,
+    excerpt, author name and avatar, dates, views as of the last rebuild),
+    newest first, so the first
+    pages of the cursor-paginated feed are served without a query. The
+    buffer is always an exact prefix of the feed: creating, editing and
+    deleting posts update it in place, a new post pushes the oldest
+    summary out, and pages that reach past its end fall back to the
+    database.
+
+    The buffer is rebuilt from the database on first use (and so after a
+    restart), and again once it is ``TIMELINE_MAX_AGE`` seconds old. Only
+    one request rebuilds at a time; others that find the buffer stale read
+    the database meanwhile. Every write bumps a generation number, and a
+    rebuild that raced with a write is discarded rather than stored.
+
+    With ``CACHE_BACKEND=redis`` all workers share one buffer. With
+    ``memory`` every process keeps its own, and writes made by other
+    processes show up only at its next rebuild, so a client could miss its
+    own new post. The buffer is therefore on by default only with the
+    shared store; enable it explicitly for single-process deployments.
+
+    Configuration:
+        TIMELINE_ENABLED (bool): Serve the feed from the buffer (default:
+            only when ``CACHE_BACKEND`` is "redis").
+        TIMELINE_SIZE (int): Posts kept.
+        TIMELINE_MAX_AGE (int): Seconds before the buffer is rebuilt (0: never).
+
+    Attributes:
+        hits (int): Feed pages served from the buffer.
+        fallbacks (int): Feed pages that needed the database.
+        rebuilds (int): Rebuilds stored.
+    """
+
+    def __init__(self, app=None, db=None):
+        self.db = db
+        self.store = None
+        self.enabled = True
+        self.size = 200
+        self.max_age = 60
+        self.hits = 0
+        self.fallbacks = 0
+        self.rebuilds = 0
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        """Configures the store from the app config."""
+        self.db = db
+        self.size = app.config.get('TIMELINE_SIZE', 200)
+        self.max_age = app.config.get('TIMELINE_MAX_AGE', 60)
+        shared = app.config.get('CACHE_BACKEND', 'memory') == 'redis'
+        enabled = app.config.get('TIMELINE_ENABLED')
+        self.enabled = shared if enabled is None else enabled
+        if shared:
+            self.store = RedisTimelineStore(app.config['CACHE_REDIS_URL'])
+        else:
+            self.store = MemoryTimelineStore()
+        app.extensions['home_timeline'] = self
+
+    def _fresh(self, state):
+        return (state is not None and state['entries'] is not None
+                and (not self.max_age or time.time() - state['built_at'] < self.max_age))
+
+    def rebuild(self):
+        """Reloads the buffer from the database.
+
+        Returns:
+            bool: False if a concurrent write made the result stale.
+        """
+        from flaskblog.models import Post, User, summarize
+
+        state = self.store.get()
+        generation = state['generation'] if state is not None else 0
+        # Always read the primary: a lagging replica would roll the buffer back.
+        rows = self.db.session.execute(
+            select(Post.id, Post.title, Post.excerpt,
+                   case((Post.excerpt.is_(None), Post.content)).label('content'),
+                   Post.date_posted, Post.updated_at, Post.views, Post.user_id,
+                   User.username, User.image_file)
+            .join(User, Post.user_id == User.id)
+            .order_by(Post.date_posted.desc(), Post.id.desc()).limit(self.size),
+            bind_arguments={'bind': self.db.engine}).all()
+        entries = []
+        for row in rows:
+            summary = {field: getattr(row, field) for field in FIELDS}
+            if summary['excerpt'] is None:
+                summary['excerpt'] = summarize(row.content)[0]
+            entries.append(summary)
+        stored = []
+
+        def replace(current):
+            if (current['generation'] if current is not None else 0) != generation:
+                return None
+            stored.append(True)
+            return {'entries': entries, 'complete': len(entries) < self.size,
+                    'built_at': time.time(), 'generation': generation}
+
+        self.store.modify(replace)
+        if stored:
+            self.rebuilds += 1
+        return bool(stored)
+
+    def _write(self, change):
+        def apply(state):
+            if state is None:
+                return {'entries': None, 'complete': False, 'built_at': 0, 'generation': 1}
+            state = dict(state, generation=state['generation'] + 1)
+            if state['entries'] is not None:
+                change(state)
+            return state
+
+        self.store.modify(apply)
+
+    def add(self, post):
+        """Inserts a newly committed post."""
+        summary = _summary(post)
+
+        def insert(state):
+            entries = [entry for entry in state['entries'] if entry['id'] != summary['id']]
+            key = _key(summary)
+            index = next((i for i, entry in enumerate(entries) if _key(entry) < key), len(entries))
+            if index == len(entries) and not state['complete']:
+                return  # Older than the buffer's tail: outside the prefix.
+            entries.insert(index, summary)
+            if len(entries) > self.size:
+                entries.pop()
+                state['complete'] = False
+            state['entries'] = entries
+
+        self._write(insert)
+
+    def update(self, post):
+        """Refreshes the summary of an edited post."""
+        summary = _summary(post)
+
+        def replace(state):
+            state['entries'] = [summary if entry['id'] == summary['id'] else entry
+                                for entry in state['entries']]
+
+        self._write(replace)
+
+    def remove(self, post_id):
+        """Drops a deleted post."""
+        def drop(state):
+            state['entries'] = [entry for entry in state['entries'] if entry['id'] != post_id]
+
+        self._write(drop)
+
+    def update_author(self, user):
+        """Refreshes the author name and avatar shown on a user's posts."""
+        def rename(state):
+            state['entries'] = [dict(entry, username=user.username, image_file=user.image_file)
+                                if entry['user_id'] == user.id else entry
+                                for entry in state['entries']]
+
+        self._write(rename)
+
+    def invalidate(self):
+        """Drops the buffer after bulk changes; the next read rebuilds it."""
+        def clear(state):
+            state['entries'] = None
+
+        self._write(clear)
+
+    def page(self, per_page, before=None, after=None):
+        """Returns a feed page from the buffer, as ``keyset_paginate`` would.
+
+        Args:
+            per_page (int): Number of posts per page.
+            before (str, optional): Cursor token; return posts older than it.
+            after (str, optional): Cursor token; return posts newer than it.
+
+        Returns:
+            KeysetPage or None: The page, or None if it is not entirely
+            inside the buffer and must be queried.
+        """
+        from flaskblog.pagination import KeysetPage, decode_cursor
+
+        if not self.enabled:
+            return None
+        state = self.store.get()
+        if not self._fresh(state):
+            # One request rebuilds; concurrent ones query instead of piling on.
+            if self.store.lock_rebuild():
+                try:
+                    self.rebuild()
+                finally:
+                    self.store.unlock_rebuild()
+                state = self.store.get()
+            if not self._fresh(state):
+                self.fallbacks += 1
+                return None
+        entries, complete = state['entries'], state['complete']
+
+        after_key = decode_cursor(after)
+        if after_key:
+            end = next((i for i, entry in enumerate(entries) if _key(entry) <= after_key), len(entries))
+            if end == len(entries) and not complete:
+                self.fallbacks += 1
+                return None
+            rows = entries[max(end - per_page, 0):end]
+            self.hits += 1
+            return KeysetPage([_to_entry(row) for row in rows], per_page,
+                              has_next=True, has_prev=end > per_page)
+
+        before_key = decode_cursor(before)
+        start = 0
+        if before_key:
+            start = next((i for i, entry in enumerate(entries) if _key(entry) < before_key), len(entries))
+        rows = entries[start:start + per_page + 1]
+        if len(rows) <= per_page and not complete:
+            self.fallbacks += 1
+            return None
+        self.hits += 1
+        return KeysetPage([_to_entry(row) for row in rows[:per_page]], per_page,
+                          has_next=len(rows) > per_page, has_prev=before_key is not None)
+
+    def stats(self):
+        """Returns buffer counters."""
+        state = self.store.get() if self.store is not None else None
+        entries = state['entries'] if state is not None else None
+        return {
+            'entries': len(entries) if entries is not None else 0,
+            'hits': self.hits,
+            'fallbacks': self.fallbacks,
+            'rebuilds': self.rebuilds,
+        }
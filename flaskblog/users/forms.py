@@ -3,9 +3,19 @@ from flask_wtf.file import FileField, FileAllowed
 from flask_login import current_user
 from wtforms import StringField, PasswordField, SubmitField, BooleanField
 from wtforms.validators import DataRequired, Length, Email, EqualTo, ValidationError
+from flaskblog.hashing import MAX_PASSWORD_BYTES
 from flaskblog.models import User
 
 
+def validate_password_bytes(form, field):
+    """Rejects passwords bcrypt cannot hash.
+
+    Raises:
+        ValidationError: If the password is longer than ``MAX_PASSWORD_BYTES`` in UTF-8.
+    """
+    if len(field.data.encode('utf-8')) > MAX_PASSWORD_BYTES:
+        raise ValidationError(f"Password must be at most {MAX_PASSWORD_BYTES} bytes long.")
+
 
 class RegistrationForm(FlaskForm):
     """Handles user registration with validation.
@@ -20,7 +30,7 @@ class RegistrationForm(FlaskForm):
     username = StringField('Username',
                            validators=[DataRequired(), Length(min=4, max=20)])
     email = StringField('Email', validators=[DataRequired(), Email()])
-    password = PasswordField('Password', validators=[DataRequired()])
+    password = PasswordField('Password', validators=[DataRequired(), validate_password_bytes])
     confirm_password = PasswordField('Confirm Password',
                                      validators=[DataRequired(), EqualTo('password')])
     submit = SubmitField('Sign Up')
@@ -136,7 +146,7 @@ class ResetPasswordForm(FlaskForm):
         - email: Required, must be a registered email.
         - submit: Submit button.
     """
-    password = PasswordField('Password', validators=[DataRequired()])
+    password = PasswordField('Password', validators=[DataRequired(), validate_password_bytes])
     confirm_password = PasswordField('Confirm Password',
                                      validators=[DataRequired(), EqualTo('password')])
     submit = SubmitField('Reset Password')
\ No newline at end of file
@@ -1,15 +1,20 @@
 from flask import Blueprint
-from flask import render_template, url_for, flash, redirect, request
-from flaskblog import db, bcrypt
+from flask import render_template, url_for, flash, redirect, request, make_response
+from flaskblog import db, hasher, home_timeline, page_cache, rate_limiter, user_cache
+from flaskblog.cache import add_cache_tags
+from flaskblog.conditional import feed_etag, not_modified, with_validators
 from flaskblog.models import User, Post
 from flaskblog.users.forms import RegistrationForm, LoginForm, UpdateAccountForm, ResetPasswordRequestForm, ResetPasswordForm
 from flask_login import login_user, current_user, logout_user, login_required
+from sqlalchemy.orm import defer, joinedload
+from flaskblog.pagination import paginate_posts
 from .utils import save_picture, send_reset_email
 
 users = Blueprint('users', __name__)
 
 
 @users.route("/register", methods=['GET', 'POST'])
+@rate_limiter.protect()
 def register():
     """Handle user registration.
     
@@ -23,14 +28,14 @@ def register():
             - Rendered register template (with form errors if any)
             
     Notes:
-        Uses bcrypt for password hashing.
+        Uses bcrypt for password hashing, run on the hashing process pool.
         Flash messages indicate success/failure to user.
     """
     if current_user.is_authenticated:
         return redirect(url_for("main.home"))
     form = RegistrationForm()
     if form.validate_on_submit():
-        hashed_password = bcrypt.generate_password_hash(form.password.data).decode('utf-8')
+        hashed_password = hasher.generate_password_hash(form.password.data)
         user = User(username=form.username.data, email=form.email.data, password=hashed_password)
         db.session.add(user)
         db.session.commit()
@@ -40,6 +45,7 @@ def register():
 
 
 @users.route("/login", methods=['GET', 'POST'])
+@rate_limiter.protect(account_field='email')
 def login():
     """
     Handles user authentication.
@@ -62,6 +68,9 @@ def login():
     Security Features:
         - Validates the next parameter to prevent open redirect vulnerabilities
         - Handles database exceptions with appropriate error messages
+        - Rehashes the stored password when BCRYPT_LOG_ROUNDS has changed
+        - Limits attempts per IP and per email; excess attempts get a 429
+          before any lookup or hashing
     """
     if current_user.is_authenticated:
         return redirect(url_for("main.home"))
@@ -72,7 +81,11 @@ def login():
         except Exception as e:
             flash("An error occurred while processing your login. Please try again later", "danger")
             return redirect(url_for("users.login"))
-        if user and bcrypt.check_password_hash(user.password, form.password.data):
+        if user and hasher.check_password_hash(user.password, form.password.data):
+            if hasher.needs_rehash(user.password):
+                # The configured work factor changed; upgrade the stored hash.
+                user.password = hasher.generate_password_hash(form.password.data)
+                db.session.commit()
             login_user(user, remember=form.remember.data)
             next_page = request.args.get('next')
             flash(f"Logged in successfully", "success")
@@ -123,43 +136,65 @@ def account():
     form = UpdateAccountForm()
     if form.validate_on_submit():
         if form.picture.data:
-            picture_file = save_picture(form.picture.data)
-            current_user.image_file = picture_file
+            try:
+                picture_file = save_picture(form.picture.data, current_user)
+            except ValueError:
+                flash("That file could not be read as an image.", "danger")
+                return redirect(url_for("users.account"))
+            if picture_file:
+                current_user.image_file = picture_file
+            else:
+                flash("Your new profile picture is being processed and will appear shortly.", "info")
         current_user.username = form.username.data
         current_user.email = form.email.data
         db.session.commit()
+        user_cache.invalidate(User, current_user.id)
+        page_cache.invalidate(f'author:{current_user.id}')
+        home_timeline.update_author(current_user)
         flash("Your account has been updated successfully!", "success")
         return redirect(url_for("users.account"))
     elif request.method == 'GET':
         form.username.data = current_user.username
         form.email.data = current_user.email
-    image_file = url_for("static", filename="profile_pics/" + current_user.image_file)
-    return render_template("account.html", title="Account", image_file=image_file, form=form)
+    return render_template("account.html", title="Account", form=form)
 
 @users.route("/user/<string:username>")
+@page_cache.cached
 def user_posts(username):
     """Displays posts by a specific user.
     
     This function retrieves and displays all posts by a specific user with pagination.
+    Totals come from the user's ``post_count``, so no page counts the posts.
     
     Args:
         username (str): The username of the user whose posts to display
         
     URL Parameters:
-        page (int): The page number for pagination (default: 1)
+        before (str): Cursor token; show posts older than it (cursor mode)
+        after (str): Cursor token; show posts newer than it (cursor mode)
+        page (int): The page number when FEED_PAGINATION is "numbered" (default: 1)
         
     Returns:
-        Rendered user_posts template with paginated posts
+        Rendered user_posts template with paginated posts, or an empty 304
+        response if the client's ETag still matches
     Raises:
         404: If the specified username does not exist
     """
-    page = request.args.get('page', 1, type=int)
     user = User.query.filter_by(username=username).first_or_404()
-    posts = Post.query.filter_by(author=user)\
-        .order_by(Post.date_posted.desc()).paginate(page=page, per_page=5)
-    return render_template('user_posts.html', posts=posts, user=user)
+    add_cache_tags(f'author:{user.id}', f'timeline:{user.id}')
+    posts = paginate_posts(Post.query.filter_by(author=user)
+                           .options(joinedload(Post.author), defer(Post.content)),
+                           total=user.post_count)
+    add_cache_tags(*(f'post:{post.id}' for post in posts.items))
+    etag = feed_etag(posts)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    response = make_response(render_template('user_posts.html', posts=posts, user=user))
+    return with_validators(response, etag)
 
 @users.route("/reset_password", methods=['GET', 'POST'])
+@rate_limiter.protect(account_field='email')
 def reset_password_request():
     """
     Handles password reset requests.
@@ -186,12 +221,14 @@ def reset_password_request():
         user = User.query.filter_by(email=form.email.data).first()
         if user:
             send_reset_email(user)
+            flash("An email has been sent with instructions to reset your password", "info")
             return redirect(url_for("users.login"))
         else:
             flash("Email not found. Please check your email and try again", "danger")
     return render_template("reset_request.html", title="Reset Password", form=form)
 
 @users.route("/reset_password/<token>", methods=['GET', 'POST'])
+@rate_limiter.protect()
 def reset_password_token(token):
     """
     Processes password reset tokens.
@@ -220,12 +257,13 @@ def reset_password_token(token):
     user = User.verify_reset_token(token)
     if user is None:
         flash("Invalid or expired token. Please try again", "danger")
-        return redirect(url_for("users.reset_token"))
+        return redirect(url_for("users.reset_password_request"))
     form = ResetPasswordForm()
     if form.validate_on_submit():
-        hashed_password = bcrypt.generate_password_hash(form.password.data).decode('utf-8')
+        hashed_password = hasher.generate_password_hash(form.password.data)
         user.password = hashed_password
         db.session.commit()
+        user_cache.invalidate(User, user.id)
         flash("Your password has been updated successfully!", "success")
         return redirect(url_for("users.login"))
     return render_template("reset_token.html", title="Reset Password", form=form)
\ No newline at end of file
@@ -0,0 +1,67 @@
+import os
+import tempfile
+from datetime import datetime, timedelta
+import pytest
+
+# Config reads the environment when flaskblog is first imported.
+_tmp = tempfile.mkdtemp(prefix='flaskblog-tests-')
+os.environ.update(
+    SECRET_KEY='test',
+    DATABASE_URI=f"sqlite:///{os.path.join(_tmp, 'blog.db')}",
+    MAIL_QUEUE_PATH=os.path.join(_tmp, 'mail.db'),
+    TEMPLATE_CACHE_DIR=os.path.join(_tmp, 'templates'),
+    PAGE_CACHE_ENABLED='0',
+    RATELIMIT_ENABLED='0',
+    BCRYPT_LOG_ROUNDS='4',
+    PASSWORD_HASH_WORKERS='0',
+)
+
+from flaskblog import create_app, db, hasher  # noqa: E402
+from flaskblog.migrations import upgrade  # noqa: E402
+from flaskblog.models import Post, User  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def app():
+    """App on a temporary SQLite database with three authors and 30 posts.
+
+    Posts are published in pairs sharing a timestamp, so pagination has
+    ties to break. Every author's password is "password".
+    """
+    app = create_app()
+    app.config['WTF_CSRF_ENABLED'] = False
+    with app.app_context():
+        upgrade()
+        password = hasher.generate_password_hash('password')
+        authors = [User(username=f'author{n}', email=f'author{n}@example.com', password=password)
+                   for n in range(3)]
+        db.session.add_all(authors)
+        db.session.flush()
+        start = datetime(2024, 1, 1)
+        for n in range(30):
+            post = Post(title=f'Post {n}', author=authors[n % 3], date_posted=start + timedelta(hours=n // 2))
+            post.set_content(f'Body of post {n}. ' * 20)
+            db.session.add(post)
+        db.session.commit()
+    yield app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def author_client(app):
+    """A client logged in as ``author0``."""
+    client = app.test_client()
+    response = client.post('/login', data={'email': 'author0@example.com', 'password': 'password'})
+    assert response.status_code == 302
+    return client
+
+
+@pytest.fixture
+def engine(app):
+    """The primary engine, for watching queries outside an app context."""
+    with app.app_context():
+        return db.engine
@@ -0,0 +1,13 @@
+"""JSON API field selection and error envelope."""
+
+
+def test_fields_selects_keys(client):
+    body = client.get('/api/v1/posts', query_string={'fields': 'id,title', 'limit': 2}).get_json()
+    assert [set(item) for item in body['items']] == [{'id', 'title'}] * 2
+
+
+def test_unknown_field_is_a_json_400(client):
+    response = client.get('/api/v1/posts', query_string={'fields': 'bogus'})
+    assert response.status_code == 400
+    assert response.is_json
+    assert response.get_json() == {'error': {'status': 400, 'message': 'Unknown fields: bogus'}}
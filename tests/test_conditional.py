@@ -0,0 +1,22 @@
+"""Conditional GETs on post pages."""
+from flaskblog import view_counter
+
+
+def test_if_none_match_returns_304(client):
+    etag = client.get('/post/1').headers['ETag']
+    response = client.get('/post/1', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+
+
+def test_if_modified_since_is_ignored(client):
+    response = client.get('/post/1')
+    assert 'Last-Modified' not in response.headers
+    response = client.get('/post/1', headers={'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'})
+    assert response.status_code == 200
+
+
+def test_view_flush_changes_etag(client):
+    etag = client.get('/post/2').headers['ETag']
+    view_counter.flush()
+    assert client.get('/post/2', headers={'If-None-Match': etag}).status_code == 200
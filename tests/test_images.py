@@ -0,0 +1,21 @@
+"""Profile picture uploads that cannot be decoded."""
+import io
+import pytest
+from PIL import Image
+
+
+def _png():
+    buffer = io.BytesIO()
+    Image.new('RGB', (40, 40), (200, 30, 30)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize('data', [b'not an image at all', _png()[:60]],
+                         ids=['garbage', 'truncated'])
+def test_unreadable_upload_is_rejected(author_client, data):
+    response = author_client.post('/account', data={
+        'username': 'author0', 'email': 'author0@example.com',
+        'picture': (io.BytesIO(data), 'avatar.png'),
+    }, content_type='multipart/form-data', follow_redirects=True)
+    assert response.status_code == 200
+    assert 'could not be read as an image' in response.get_data(as_text=True)
@@ -0,0 +1,23 @@
+"""Page cache behaviour for anonymous visitors."""
+import pytest
+from flaskblog import page_cache
+
+
+@pytest.fixture
+def cache_on(monkeypatch):
+    monkeypatch.setattr(page_cache, 'enabled', True)
+    page_cache.backend.clear()
+    yield page_cache
+    page_cache.backend.clear()
+
+
+def test_new_post_invalidates_home(cache_on, client, author_client):
+    assert client.get('/home').headers['X-Cache'] == 'MISS'
+    assert client.get('/home').headers['X-Cache'] == 'HIT'
+
+    response = author_client.post('/post/new', data={'title': 'Freshly cached', 'content': 'New body'})
+    assert response.status_code == 302
+
+    response = client.get('/home')
+    assert response.headers['X-Cache'] == 'MISS'
+    assert 'Freshly cached' in response.get_data(as_text=True)
@@ -0,0 +1,32 @@
+"""Keyset pagination: walking the cursors visits every post exactly once."""
+from flaskblog import db
+from flaskblog.models import Post
+
+
+def _newest_first(app):
+    with app.app_context():
+        return list(db.session.scalars(
+            db.select(Post.id).order_by(Post.date_posted.desc(), Post.id.desc())))
+
+
+def _page(client, **cursor):
+    body = client.get('/api/v1/posts', query_string=dict(cursor, fields='id', limit=7)).get_json()
+    return [item['id'] for item in body['items']], body
+
+
+def test_cursor_round_trip(app, client):
+    expected = _newest_first(app)
+
+    forward = []
+    ids, body = _page(client)
+    forward.append(ids)
+    while body['next_cursor'] is not None:
+        ids, body = _page(client, before=body['next_cursor'])
+        forward.append(ids)
+    assert [post_id for ids in forward for post_id in ids] == expected
+
+    backward = [forward[-1]]
+    while body['prev_cursor'] is not None:
+        ids, body = _page(client, after=body['prev_cursor'])
+        backward.append(ids)
+    assert backward[::-1] == forward
@@ -0,0 +1,19 @@
+"""Query budgets for the list pages, guarding against N+1 regressions."""
+import pytest
+from flaskblog.testing import assert_max_queries
+
+
+@pytest.mark.parametrize('pagination, limit', [('cursor', 1), ('numbered', 2)])
+def test_home(app, client, engine, monkeypatch, pagination, limit):
+    monkeypatch.setitem(app.config, 'FEED_PAGINATION', pagination)
+    with assert_max_queries(limit, engine):
+        response = client.get('/home')
+    assert response.status_code == 200
+    assert response.get_data(as_text=True).count('class="article-title"') == 5
+
+
+def test_user_posts(client, engine):
+    with assert_max_queries(2, engine):
+        response = client.get('/user/author1')
+    assert response.status_code == 200
+    assert response.get_data(as_text=True).count('class="article-title"') == 5
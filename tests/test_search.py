@@ -0,0 +1,17 @@
+"""Search returns the same hit on the FTS5 index and the in-memory fallback."""
+import pytest
+
+
+@pytest.mark.parametrize('backend', ['fts5', 'memory'])
+def test_search_hit(app, client, monkeypatch, backend):
+    monkeypatch.setitem(app.config, 'SEARCH_BACKEND', backend)
+    # The backend is chosen once per app; choose again for this config.
+    monkeypatch.delitem(app.extensions, 'search', raising=False)
+
+    response = client.get('/search', query_string={'q': 'post 17'})
+
+    assert response.status_code == 200
+    html = response.get_data(as_text=True)
+    assert '>Post 17</a>' in html
+    assert '>Post 16</a>' not in html
+    assert app.extensions['search'].name == backend